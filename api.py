@@ -0,0 +1,183 @@
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Tuple
+from main import PIIMaskingTool
+from logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class ServiceOverloaded(Exception):
+    """Raised when too many requests are already waiting to be processed."""
+
+
+class MaskingService:
+    """Collects concurrent mask requests into micro-batches for PIIMaskingTool."""
+
+    def __init__(
+            self,
+            tool: Optional[PIIMaskingTool] = None,
+            max_batch_size: int = 64,
+            max_wait_ms: float = 5.0,
+            max_pending: int = 1024,
+            use_cache: bool = True,
+            executor: Optional[Executor] = None
+    ):
+        self.tool = tool or PIIMaskingTool()
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_pending = max_pending
+        self.use_cache = use_cache
+
+        # One thread keeps the tool's caches single-threaded; CPU work can
+        # still fan out through PIIMaskingTool(workers=N)
+        self.executor = executor or ThreadPoolExecutor(max_workers=1)
+        self.queue: Optional[asyncio.Queue] = None
+        self.pending = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start the background batching loop."""
+        if self._task is None:
+            self.queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the batching loop and release the tool."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+            # Fail requests that were still waiting for a batch
+            while not self.queue.empty():
+                _, future = self.queue.get_nowait()
+                if not future.done():
+                    future.set_exception(ServiceOverloaded("Service is shutting down"))
+        self.executor.shutdown(wait=True)
+        self.tool.close()
+
+    async def mask_email(self, email_body: str) -> Dict[str, Any]:
+        """Queue one email and wait for its masked, classified response."""
+        if self._task is None:
+            await self.start()
+        if self.pending >= self.max_pending:
+            raise ServiceOverloaded(f"{self.pending} requests already pending")
+
+        future = asyncio.get_running_loop().create_future()
+        self.pending += 1
+        self.queue.put_nowait((email_body, future))
+        try:
+            return await future
+        finally:
+            self.pending -= 1
+
+    @staticmethod
+    def _fail(batch: List[Tuple[str, asyncio.Future]]):
+        """Fail the unresolved requests of a batch cut short by shutdown."""
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(ServiceOverloaded("Service is shutting down"))
+
+    async def _collect(self) -> List[Tuple[str, asyncio.Future]]:
+        """Wait for one request, then gather more until the size or time limit."""
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            # Take whatever is already queued without yielding
+            while len(batch) < self.max_batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            timeout = deadline - loop.time()
+            if len(batch) >= self.max_batch_size or timeout <= 0:
+                break
+
+            # asyncio.wait (unlike wait_for) never swallows our cancellation
+            getter = asyncio.ensure_future(self.queue.get())
+            try:
+                done, _ = await asyncio.wait({getter}, timeout=timeout)
+            except asyncio.CancelledError:
+                if getter.done() and not getter.cancelled():
+                    batch.append(getter.result())
+                getter.cancel()
+                # These requests are already off the queue, so stop() cannot fail them
+                self._fail(batch)
+                raise
+            if not done:
+                getter.cancel()
+                break
+            batch.append(getter.result())
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            texts = [text for text, _ in batch]
+            try:
+                output = await loop.run_in_executor(
+                    self.executor, self.tool.process_batch, texts, self.use_cache
+                )
+            except asyncio.CancelledError:
+                self._fail(batch)
+                raise
+            except Exception as e:
+                logger.error(f"Batch processing error: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (text, future), result in zip(batch, output['results']):
+                if not future.done():
+                    future.set_result(self.to_response(text, result))
+
+    @staticmethod
+    def to_response(text: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Shape a tool result as the documented /mask_email response."""
+        return {
+            'input_email_body': text,
+            'list_of_masked_entities': result['entities'],
+            'masked_email': result['masked_text'],
+            'category_of_the_email': result['category_of_the_email']
+        }
+
+
+def create_app(service: Optional[MaskingService] = None):
+    """Build the FastAPI application serving POST /mask_email."""
+    from fastapi import FastAPI, HTTPException
+    from pydantic import BaseModel
+
+    service = service or MaskingService()
+
+    class EmailRequest(BaseModel):
+        email_body: str
+
+    @asynccontextmanager
+    async def lifespan(app):
+        await service.start()
+        yield
+        await service.stop()
+
+    app = FastAPI(title="Email PII Masking Tool", lifespan=lifespan)
+
+    @app.post("/mask_email")
+    async def mask_email(request: EmailRequest) -> Dict[str, Any]:
+        try:
+            return await service.mask_email(request.email_body)
+        except ServiceOverloaded as e:
+            raise HTTPException(status_code=503, detail=str(e))
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(create_app(), host="0.0.0.0", port=8000)
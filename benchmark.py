@@ -0,0 +1,363 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from detector import PIIDetector
+from masker import PIIMasker
+from cache_manager import CacheManager
+from model import MODEL_PATH
+from compact_model import COMPACT_MODEL_PATH
+
+FIRST_NAMES = ["Rahul", "Priya", "John", "Anita", "Vikram", "Sara", "Arjun", "Meera"]
+LAST_NAMES = ["Sharma", "Iyer", "Doe", "Patel", "Reddy", "Khan", "Nair", "Gupta"]
+FILLER = (
+    "please look into my account the payment failed yesterday and I was charged "
+    "again for the same order kindly refund the amount as soon as possible thanks "
+    "for your help regarding the ticket we discussed earlier this week"
+).split()
+
+
+def _digits(rng: random.Random, n: int) -> str:
+    return "".join(rng.choice("0123456789") for _ in range(n))
+
+
+# One generator per type in PIIDetector.patterns
+PII_GENERATORS: Dict[str, Callable[[random.Random], str]] = {
+    'full_name': lambda rng: f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+    'email': lambda rng: f"{rng.choice(FIRST_NAMES).lower()}.{_digits(rng, 2)}@example.com",
+    'phone_number': lambda rng: f"+91{rng.choice('6789')}{_digits(rng, 9)}",
+    'dob': lambda rng: f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(1950, 2005)}",
+    'aadhar_num': lambda rng: f"{_digits(rng, 4)} {_digits(rng, 4)} {_digits(rng, 4)}",
+    'credit_debit_no': lambda rng: "-".join(_digits(rng, 4) for _ in range(4)),
+    'cvv_no': lambda rng: _digits(rng, 3),
+    'expiry_no': lambda rng: f"{rng.randint(1, 12):02d}/{rng.randint(25, 35)}"
+}
+
+
+def generate_email(rng: random.Random, words: int = 80, pii_density: float = 0.05) -> str:
+    """Build a synthetic email where roughly pii_density of the tokens are PII."""
+    pii_types = list(PII_GENERATORS)
+    tokens = []
+    for _ in range(words):
+        if rng.random() < pii_density:
+            tokens.append(PII_GENERATORS[rng.choice(pii_types)](rng))
+        else:
+            tokens.append(rng.choice(FILLER))
+    return " ".join(tokens) + "."
+
+
+def generate_emails(
+        count: int,
+        seed: int = 42,
+        words: int = 80,
+        pii_density: float = 0.05
+) -> List[str]:
+    rng = random.Random(seed)
+    return [generate_email(rng, words, pii_density) for _ in range(count)]
+
+
+def measure(fn: Callable[[Any], Any], items: Sequence[Any], warmup: int = 10) -> Dict[str, float]:
+    """Time fn over items and report throughput and latency percentiles."""
+    for item in items[:warmup]:
+        fn(item)
+
+    latencies = []
+    started = time.perf_counter()
+    for item in items:
+        t0 = time.perf_counter()
+        fn(item)
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+
+    def percentile(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+
+    return {
+        'count': len(items),
+        'throughput_per_s': len(items) / elapsed if elapsed else 0.0,
+        'mean_ms': sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+        'p50_ms': percentile(0.50) if latencies else 0.0,
+        'p90_ms': percentile(0.90) if latencies else 0.0,
+        'p99_ms': percentile(0.99) if latencies else 0.0,
+        'max_ms': latencies[-1] * 1000 if latencies else 0.0
+    }
+
+
+def bench_detector(emails: List[str]) -> Dict[str, Any]:
+    detector = PIIDetector()
+    return {
+        'detect': measure(detector.detect, emails),
+        'scan': measure(detector.scan, emails)
+    }
+
+
+# Adversarial inputs aimed at backtracking in the detector patterns
+PATHOLOGICAL_INPUTS: Dict[str, Callable[[int], str]] = {
+    'email_local_part_run': lambda n: '@' + 'a.' * n,
+    'digit_separator_run': lambda n: '1 - ' * n + 'a',
+    'capitalized_words': lambda n: 'Abc' * n + ' Q',
+    'long_separator_run': lambda n: '1' + '-' * (n * 2) + '1',
+    'separator_run_before_word': lambda n: '-' * n + 'a',
+    'word_run_after_letter': lambda n: 'é' + 'a' * n + '.',
+    'alternating_local_part': lambda n: '.a' * n
+}
+
+
+def bench_pathological(size: int = 20000) -> Dict[str, Any]:
+    """Time each detector backend once per adversarial input."""
+    backends = ['re']
+    try:
+        import regex  # noqa: F401  (needed by the linear backend)
+        backends.append('linear')
+    except ImportError:
+        pass
+
+    results: Dict[str, Any] = {}
+    for name, build in PATHOLOGICAL_INPUTS.items():
+        text = build(size)
+        results[name] = {'chars': len(text)}
+        for backend in backends:
+            detector = PIIDetector(backend=backend)
+            started = time.perf_counter()
+            detector.scan(text)
+            results[name][f'{backend}_s'] = time.perf_counter() - started
+    return results
+
+
+def bench_masker(emails: List[str]) -> Dict[str, Any]:
+    detector = PIIDetector()
+    masker = PIIMasker()
+    with_findings = [(text, detector.detect(text)) for text in emails]
+    with_matches = [(text, detector.scan(text)) for text in emails]
+    return {
+        'mask': measure(lambda item: masker.mask(*item), with_findings),
+        'mask_spans': measure(lambda item: masker.mask_spans(*item), with_matches)
+    }
+
+
+def bench_columnar(emails: List[str]) -> Dict[str, Any]:
+    """Compare whole-column detection and masking with a per-email loop."""
+    from columnar import detect_column, mask_column
+    from text_processor import TextProcessor
+
+    detector = PIIDetector()
+    masker = PIIMasker()
+    processor = TextProcessor(detector, masker)
+
+    started = time.perf_counter()
+    for text in emails:
+        processor.process_detailed(text)
+    loop_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    table = detect_column(emails, detector)
+    detect_time = time.perf_counter() - started
+    mask_column(emails, table, masker=masker)
+    columnar_time = time.perf_counter() - started
+
+    return {
+        'loop_throughput_per_s': len(emails) / loop_time if loop_time else 0.0,
+        'columnar_throughput_per_s': len(emails) / columnar_time if columnar_time else 0.0,
+        'detect_column_s': detect_time,
+        'table_rows': len(table),
+        'table_bytes': int(table.memory_usage(deep=True).sum())
+    }
+
+
+def bench_cache(emails: List[str], sizes: Sequence[int]) -> Dict[str, Any]:
+    """Measure lookups and inserts against caches prefilled to each size."""
+    results: Dict[str, Any] = {}
+    for backend in ('db', 'json'):
+        for size in sizes:
+            with tempfile.TemporaryDirectory() as tmp:
+                cache = CacheManager(
+                    cache_file=os.path.join(tmp, f"bench.{backend}"),
+                    config={'max_size': max(size // 10, 1)}
+                )
+                cache.add_many([
+                    (f"prefill-{i}", "masked", None, None) for i in range(size)
+                ])
+                hits = [f"prefill-{i}" for i in range(0, size, max(size // len(emails), 1))]
+                results[f"{backend}_{size}"] = {
+                    'get_hit': measure(cache.get_from_cache, hits),
+                    'get_miss': measure(cache.get_from_cache, emails),
+                    'add': measure(lambda text: cache.add_to_cache(text, text), emails)
+                }
+                cache.close()
+    return results
+
+
+def bench_classifier(emails: List[str], model_path: str) -> Dict[str, Any]:
+    from model import EmailClassifier
+
+    classifier = EmailClassifier(model_path)
+    load_started = time.perf_counter()
+    classifier.model
+    load_time = time.perf_counter() - load_started
+
+    batch_started = time.perf_counter()
+    classifier.predict_many(emails)
+    batch_time = time.perf_counter() - batch_started
+
+    return {
+        'load_s': load_time,
+        'predict': measure(classifier.predict, emails),
+        'predict_many_throughput_per_s': len(emails) / batch_time if batch_time else 0.0
+    }
+
+
+def bench_compact_classifier(emails: List[str], model_path: str, compact_path: str) -> Dict[str, Any]:
+    """Time the compact model and check it agrees with the original pipeline."""
+    import joblib
+    from compact_model import CompactModel, check_agreement
+
+    results = bench_classifier(emails, compact_path)
+    results['agreement'] = check_agreement(joblib.load(model_path), CompactModel(compact_path), emails)
+    return results
+
+
+def bench_end_to_end(emails: List[str]) -> Dict[str, Any]:
+    from main import PIIMaskingTool
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tool = PIIMaskingTool()
+        tool.cache.close()
+        tool.cache = CacheManager(cache_file=os.path.join(tmp, "bench.db"))
+        results = {
+            'process_text_no_cache': measure(lambda t: tool.process_text(t, use_cache=False), emails),
+            'process_text_cold': measure(tool.process_text, emails, warmup=0),
+            'process_text_warm': measure(tool.process_text, emails)
+        }
+        batch_started = time.perf_counter()
+        tool.process_batch(emails, use_cache=False)
+        batch_time = time.perf_counter() - batch_started
+        results['process_batch_throughput_per_s'] = len(emails) / batch_time if batch_time else 0.0
+        tool.close()
+    return results
+
+
+# Modules timed by bench_imports, and the heavy packages none of the
+# masking-only ones should pull in
+IMPORT_MODULES = ('detector', 'masker', 'text_processor', 'cache_manager', 'main', 'cli', 'api')
+HEAVY_PACKAGES = ('numpy', 'pandas', 'sklearn', 'joblib', 'multiprocessing')
+
+_IMPORT_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - started
+print(json.dumps({{'seconds': seconds, 'heavy': [p for p in {heavy!r} if p in sys.modules]}}))
+"""
+
+
+def bench_imports(modules: Sequence[str] = IMPORT_MODULES, repeat: int = 3) -> Dict[str, Any]:
+    """Time a cold import of each module in a fresh interpreter (best of repeat)."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    results: Dict[str, Any] = {}
+    for module in modules:
+        runs = []
+        for _ in range(repeat):
+            output = subprocess.run(
+                [sys.executable, "-c", _IMPORT_PROBE.format(module=module, heavy=HEAVY_PACKAGES)],
+                cwd=here, capture_output=True, text=True
+            )
+            if output.returncode != 0:
+                runs = []
+                results[module] = {'error': output.stderr.strip().splitlines()[-1]}
+                break
+            runs.append(json.loads(output.stdout))
+        if runs:
+            results[module] = {
+                'import_ms': min(run['seconds'] for run in runs) * 1000,
+                'heavy_modules': runs[0]['heavy']
+            }
+    return results
+
+
+def run_benchmarks(
+        count: int = 1000,
+        seed: int = 42,
+        words: int = 80,
+        pii_density: float = 0.05,
+        cache_sizes: Sequence[int] = (1000, 10000, 100000),
+        model_path: str = MODEL_PATH,
+        compact_path: str = COMPACT_MODEL_PATH
+) -> Dict[str, Any]:
+    emails = generate_emails(count, seed, words, pii_density)
+    report: Dict[str, Any] = {
+        'params': {
+            'count': count,
+            'seed': seed,
+            'words': words,
+            'pii_density': pii_density,
+            'cache_sizes': list(cache_sizes)
+        },
+        'environment': {
+            'python': sys.version.split()[0],
+            'platform': platform.platform()
+        },
+        'detector': bench_detector(emails),
+        'masker': bench_masker(emails),
+        'pathological': bench_pathological(),
+        'columnar': bench_columnar(emails),
+        'imports': bench_imports(),
+        'cache': bench_cache(emails, cache_sizes)
+    }
+
+    # Classification needs a trained model; see model.train_model
+    if os.path.exists(model_path):
+        report['classifier'] = bench_classifier(emails, model_path)
+        report['end_to_end'] = bench_end_to_end(emails)
+        # Export with: python compact_model.py
+        if os.path.isdir(compact_path):
+            report['compact_classifier'] = bench_compact_classifier(emails, model_path, compact_path)
+    else:
+        report['classifier'] = report['end_to_end'] = {
+            'skipped': f"model not found at {model_path}"
+        }
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the PII masking hot paths.")
+    parser.add_argument("--count", type=int, default=1000, help="Synthetic emails to generate")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--words", type=int, default=80, help="Tokens per email")
+    parser.add_argument("--pii-density", type=float, default=0.05, help="Fraction of PII tokens")
+    parser.add_argument(
+        "--cache-sizes", type=int, nargs="+", default=[1000, 10000, 100000]
+    )
+    parser.add_argument("--model-path", default=MODEL_PATH)
+    parser.add_argument("--compact-path", default=COMPACT_MODEL_PATH)
+    parser.add_argument("-o", "--output", help="Write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(
+        count=args.count,
+        seed=args.seed,
+        words=args.words,
+        pii_density=args.pii_density,
+        cache_sizes=args.cache_sizes,
+        model_path=args.model_path,
+        compact_path=args.compact_path
+    )
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
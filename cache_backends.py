@@ -0,0 +1,242 @@
+import os
+import json
+import heapq
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Any, Optional, List, Iterable, Tuple, Union
+from logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Cache keys are raw digests; text keys from older caches still work
+Key = Union[bytes, str]
+
+
+def expiry_epoch(value: Union[str, float, int]) -> float:
+    """Normalize an entry's expiry (epoch seconds or legacy ISO string)."""
+    if isinstance(value, str):
+        return datetime.fromisoformat(value).timestamp()
+    return float(value)
+
+
+class CacheBackend:
+    """Persistent storage interface used by CacheManager."""
+
+    def get(self, key: Key) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def get_many(self, keys: List[Key]) -> Dict[Key, Dict[str, Any]]:
+        """Return the stored entries for the keys that exist."""
+        found = {}
+        for key in keys:
+            entry = self.get(key)
+            if entry is not None:
+                found[key] = entry
+        return found
+
+    def put(self, key: Key, entry: Dict[str, Any]):
+        self.put_many({key: entry})
+
+    def put_many(self, entries: Dict[Key, Dict[str, Any]]):
+        raise NotImplementedError
+
+    def delete_many(self, keys: Iterable[Key]):
+        raise NotImplementedError
+
+    def delete_expired(self, now: float) -> int:
+        """Drop every entry that expired before now; return how many."""
+        raise NotImplementedError
+
+    def flush(self):
+        """Make pending writes durable."""
+
+    def close(self):
+        self.flush()
+
+
+class JSONFileBackend(CacheBackend):
+    """Keeps the whole cache in one JSON file, rewritten only on flush."""
+
+    @staticmethod
+    def _encode(key: Key) -> str:
+        """JSON object keys must be text, so digests are stored as hex."""
+        return key.hex() if isinstance(key, bytes) else key
+
+    def __init__(self, cache_file: str):
+        self.cache_file = cache_file
+        self.data: Dict[str, Dict[str, Any]] = {}
+        # (expires, key) min-heap; stale records are skipped when popped
+        self.expiry_heap: List[Tuple[float, str]] = []
+        self.dirty = False
+        self.load()
+
+    def load(self):
+        """Load cache from file."""
+        try:
+            with open(self.cache_file, 'r') as f:
+                self.data = json.load(f)
+            for entry in self.data.values():
+                entry['expires'] = expiry_epoch(entry['expires'])
+        except FileNotFoundError:
+            self.data = {}
+        except Exception as e:
+            logger.error(f"Cache load error: {e}")
+            self.data = {}
+
+        self.expiry_heap = [(entry['expires'], key) for key, entry in self.data.items()]
+        heapq.heapify(self.expiry_heap)
+
+    def get(self, key: Key) -> Optional[Dict[str, Any]]:
+        return self.data.get(self._encode(key))
+
+    def put_many(self, entries: Dict[Key, Dict[str, Any]]):
+        if entries:
+            for key, entry in entries.items():
+                key = self._encode(key)
+                self.data[key] = entry
+                heapq.heappush(self.expiry_heap, (entry['expires'], key))
+            self.dirty = True
+
+    def delete_many(self, keys: Iterable[Key]):
+        for key in keys:
+            if self.data.pop(self._encode(key), None) is not None:
+                self.dirty = True
+
+    def delete_expired(self, now: float) -> int:
+        removed = 0
+        while self.expiry_heap and self.expiry_heap[0][0] <= now:
+            expires, key = heapq.heappop(self.expiry_heap)
+            entry = self.data.get(key)
+            if entry is not None and entry['expires'] == expires:
+                del self.data[key]
+                removed += 1
+        if removed:
+            self.dirty = True
+        return removed
+
+    def flush(self):
+        """Save cache to file if anything changed."""
+        if not self.dirty:
+            return
+        try:
+            tmp_file = f"{self.cache_file}.tmp"
+            with open(tmp_file, 'w') as f:
+                json.dump(self.data, f, separators=(',', ':'))
+            os.replace(tmp_file, self.cache_file)
+            self.dirty = False
+        except Exception as e:
+            logger.error(f"Cache save error: {e}")
+
+
+class SQLiteBackend(CacheBackend):
+    """Stores entries in SQLite (WAL mode) with batched commits."""
+
+    def __init__(self, cache_file: str, commit_every: int = 100):
+        self.cache_file = cache_file
+        self.commit_every = commit_every
+        self.pending = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(cache_file, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key BLOB PRIMARY KEY, value TEXT NOT NULL, "
+            "expires REAL NOT NULL DEFAULT 0)"
+        )
+        self._migrate()
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS entries_expires ON entries (expires)"
+        )
+        self.conn.commit()
+
+    def _migrate(self):
+        """Add the numeric expiry column to caches created without it."""
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(entries)")}
+        if 'expires' in columns:
+            return
+        self.conn.execute(
+            "ALTER TABLE entries ADD COLUMN expires REAL NOT NULL DEFAULT 0"
+        )
+        rows = self.conn.execute("SELECT key, value FROM entries").fetchall()
+        self.conn.executemany(
+            "UPDATE entries SET expires = ? WHERE key = ?",
+            [(expiry_epoch(json.loads(value)['expires']), key) for key, value in rows]
+        )
+
+    def is_empty(self) -> bool:
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM entries LIMIT 1").fetchone() is None
+
+    def get(self, key: Key) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT value FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_many(self, keys: List[Key]) -> Dict[Key, Dict[str, Any]]:
+        found = {}
+        # Stay well below SQLite's bound-parameter limit
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            with self.lock:
+                rows = self.conn.execute(
+                    f"SELECT key, value FROM entries WHERE key IN ({placeholders})",
+                    chunk
+                ).fetchall()
+            found.update((key, json.loads(value)) for key, value in rows)
+        return found
+
+    def put_many(self, entries: Dict[Key, Dict[str, Any]]):
+        if not entries:
+            return
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO entries (key, value, expires) VALUES (?, ?, ?)",
+                [(key, json.dumps(entry, separators=(',', ':')), entry['expires'])
+                 for key, entry in entries.items()]
+            )
+            self._maybe_commit(len(entries))
+
+    def delete_many(self, keys: Iterable[Key]):
+        with self.lock:
+            cursor = self.conn.executemany(
+                "DELETE FROM entries WHERE key = ?", [(key,) for key in keys]
+            )
+            self._maybe_commit(cursor.rowcount)
+
+    def delete_expired(self, now: float) -> int:
+        # Served by the expires index, so only expired rows are touched
+        with self.lock:
+            cursor = self.conn.execute("DELETE FROM entries WHERE expires <= ?", (now,))
+            self.conn.commit()
+            self.pending = 0
+            return cursor.rowcount
+
+    def _maybe_commit(self, writes: int):
+        """Commit once enough writes are pending (lock must be held)."""
+        self.pending += max(writes, 0)
+        if self.pending >= self.commit_every:
+            self.conn.commit()
+            self.pending = 0
+
+    def flush(self):
+        with self.lock:
+            if self.pending:
+                self.conn.commit()
+                self.pending = 0
+
+    def close(self):
+        self.flush()
+        with self.lock:
+            self.conn.close()
+
+
+def create_backend(cache_file: str, **kwargs) -> CacheBackend:
+    """Pick a backend from the cache file extension."""
+    if cache_file.endswith('.json'):
+        return JSONFileBackend(cache_file)
+    return SQLiteBackend(cache_file, **kwargs)
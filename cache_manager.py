@@ -1,79 +1,294 @@
 import os
-from typing import Dict, Any, Optional
-import json, hashlib
-from datetime import datetime, timedelta
+import time
+import heapq
+import weakref
+from typing import Dict, Any, Optional, List, Tuple
+from cache_backends import CacheBackend, JSONFileBackend, SQLiteBackend, Key, create_backend, expiry_epoch
+from entities import EntityColumns
+from hashing import text_digest
+from memory_cache import BoundedCache
+from validator import ConfigValidator
 from logger import setup_logger
 
 logger = setup_logger(__name__)
 
+LEGACY_CACHE_FILE = "cache/pii_cache.json"
+
+DEFAULT_CACHE_CONFIG = {
+    'ttl_hours': 24,
+    'max_size': 10000,
+    'policy': 'lru',
+    'sweep_interval_seconds': 300,
+    # Pending writes are made durable at least this often
+    'flush_interval_seconds': 5,
+    'hash_algorithm': 'blake2b'
+}
+
 
 class CacheManager:
     """Manages caching of masked text and PII mappings."""
 
-    def __init__(self, cache_file: str = "cache/pii_cache.json"):
+    def __init__(
+            self,
+            cache_file: str = "cache/pii_cache.db",
+            backend: Optional[CacheBackend] = None,
+            config: Optional[Dict[str, Any]] = None
+    ):
+        config = {**DEFAULT_CACHE_CONFIG, **(config or {})}
+        if not ConfigValidator.validate_cache_config(config):
+            raise ValueError("Invalid cache configuration")
+
         self.cache_file = cache_file
+        self.ttl_hours = config['ttl_hours']
         os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)  # Ensure directory exists
-        self.cache: Dict[str, Any] = {}
-        self.load_cache()
+        self.backend = backend or create_backend(cache_file)
+
+        # Bounded hot tier in front of the persistent store
+        self.memory = BoundedCache(
+            max_entries=config['max_size'],
+            max_bytes=config.get('max_bytes'),
+            policy=config['policy']
+        )
+        # (expires, key) min-heap over the memory tier for bulk expiry
+        self.expiry_heap: List[Tuple[float, Key]] = []
+        self.sweep_interval = config['sweep_interval_seconds']
+        self.flush_interval = config['flush_interval_seconds']
+        self.next_flush = time.time() + self.flush_interval
+
+        # Closes the backend, flushing pending writes, when the manager is
+        # garbage collected or the interpreter exits without close()
+        self._finalizer = weakref.finalize(self, self.backend.close)
+        self.next_sweep = 0.0
+        self.hash_algorithm = config['hash_algorithm']
+
+        self._import_legacy_cache()
+
+    def _import_legacy_cache(self):
+        """Seed a fresh SQLite cache from the old whole-file JSON cache."""
+        try:
+            # Legacy keys are md5 hex digests, useless under any other hash
+            if (
+                    self.hash_algorithm == 'md5'
+                    and isinstance(self.backend, SQLiteBackend)
+                    and os.path.exists(LEGACY_CACHE_FILE)
+                    and self.backend.is_empty()
+            ):
+                self.backend.put_many({
+                    bytes.fromhex(key): entry
+                    for key, entry in JSONFileBackend(LEGACY_CACHE_FILE).data.items()
+                })
+                self.backend.flush()
+        except Exception as e:
+            logger.error(f"Legacy cache import error: {e}")
+
+    @staticmethod
+    def _entry(
+            masked: str,
+            entities: Optional[EntityColumns],
+            ttl_hours: int,
+            category: Optional[str] = None,
+            classified_on: str = 'raw'
+    ) -> Dict[str, Any]:
+        # Findings and entity dicts are rebuilt from the columns on read
+        entry = {
+            'masked': masked,
+            'spans': (entities or EntityColumns()).to_json(),
+            'expires': time.time() + ttl_hours * 3600
+        }
+        if category is not None:
+            # Which text ('raw' or 'masked') the category was predicted from
+            entry['category'] = category
+            entry['classified_on'] = classified_on
+        return entry
+
+    @staticmethod
+    def entities_of(entry: Dict[str, Any]) -> EntityColumns:
+        """The entities of a cached entry, including entries from older formats."""
+        if 'spans' in entry:
+            return EntityColumns.from_json(entry['spans'])
+        if entry.get('entities'):
+            return EntityColumns.from_entities(entry['entities'])
+        return EntityColumns.from_findings(entry.get('findings', {}))
+
+    def _remember(self, key: Key, entry: Dict[str, Any]):
+        """Keep an entry in the memory tier and index its expiry."""
+        self.memory.put(key, entry)
+        heapq.heappush(self.expiry_heap, (entry['expires'], key))
+
+    def _maybe_sweep(self, now: float):
+        """Run the expiry sweep at most once per interval."""
+        if now >= self.next_sweep:
+            self.next_sweep = now + self.sweep_interval
+            self.sweep_expired(now)
+
+    def _maybe_flush(self, now: float):
+        """Flush the backend at most flush_interval seconds after the last flush."""
+        if now >= self.next_flush:
+            self.next_flush = now + self.flush_interval
+            self.backend.flush()
+
+    def sweep_expired(self, now: Optional[float] = None) -> int:
+        """Drop expired entries from both tiers in bulk."""
+        now = time.time() if now is None else now
+        try:
+            while self.expiry_heap and self.expiry_heap[0][0] <= now:
+                expires, key = heapq.heappop(self.expiry_heap)
+                entry = self.memory.data.get(key)
+                if entry is not None and entry['expires'] == expires:
+                    self.memory.pop(key)
+
+            # The heap only tracks live memory entries, so drop stale records
+            # once they outnumber them to keep it bounded
+            if len(self.expiry_heap) > 2 * max(len(self.memory), 1024):
+                self.expiry_heap = [
+                    (entry['expires'], key) for key, entry in self.memory.data.items()
+                ]
+                heapq.heapify(self.expiry_heap)
+
+            removed = self.backend.delete_expired(now)
+            if removed:
+                logger.info(f"Swept {removed} expired cache entries")
+            return removed
+
+        except Exception as e:
+            logger.error(f"Cache sweep error: {e}")
+            return 0
 
     def add_to_cache(
             self,
             original: str,
             masked: str,
-            findings: Dict,
-            ttl_hours: int = 24
+            entities: Optional[EntityColumns] = None,
+            ttl_hours: Optional[int] = None,
+            key: Optional[bytes] = None,
+            category: Optional[str] = None,
+            classified_on: str = 'raw'
     ):
-        """Add entry to cache with TTL."""
+        """Add entry to cache with TTL; pass the key from key_for to skip rehashing."""
         try:
-            self.cache[self._hash(original)] = {
-                'masked': masked,
-                'findings': findings,
-                'expires': (
-                        datetime.now() + timedelta(hours=ttl_hours)
-                ).isoformat()
-            }
-            self.save_cache()
+            key = key or self.key_for(original)
+            entry = self._entry(
+                masked, entities, ttl_hours or self.ttl_hours, category, classified_on
+            )
+            self._remember(key, entry)
+            self.backend.put(key, entry)
+            now = time.time()
+            self._maybe_flush(now)
+            self._maybe_sweep(now)
 
         except Exception as e:
             logger.error(f"Cache addition error: {e}")
 
-    def get_from_cache(self, text: str) -> Optional[Dict]:
+    def get_from_cache(self, text: str, key: Optional[bytes] = None) -> Optional[Dict]:
         """Retrieve cached entry if exists and not expired."""
         try:
-            key = self._hash(text)
-            if key in self.cache:
-                entry = self.cache[key]
-                if datetime.now() < datetime.fromisoformat(entry['expires']):
+            now = time.time()
+            self._maybe_sweep(now)
+
+            key = key or self.key_for(text)
+            entry = self.memory.get(key)
+            from_memory = entry is not None
+            if not from_memory:
+                entry = self.backend.get(key)
+            if entry is not None:
+                entry['expires'] = expiry_epoch(entry['expires'])
+                if now < entry['expires']:
+                    if not from_memory:
+                        self._remember(key, entry)
                     return entry
-                else:
-                    del self.cache[key]
-                    self.save_cache()
+                self.memory.pop(key)
+                self.backend.delete_many([key])
             return None
 
         except Exception as e:
             logger.error(f"Cache retrieval error: {e}")
             return None
 
+    def get_many(
+            self,
+            texts: List[str],
+            keys: Optional[List[bytes]] = None
+    ) -> List[Optional[Dict]]:
+        """Retrieve cached entries for many texts in one backend query."""
+        try:
+            now = time.time()
+            self._maybe_sweep(now)
+
+            if keys is None:
+                keys = [self.key_for(text) for text in texts]
+            found = {}
+            missing = []
+            for key in set(keys):
+                entry = self.memory.get(key)
+                if entry is None:
+                    missing.append(key)
+                else:
+                    found[key] = entry
+            loaded = self.backend.get_many(missing) if missing else {}
+            found.update(loaded)
+
+            for entry in loaded.values():
+                entry['expires'] = expiry_epoch(entry['expires'])
+            expired = [key for key, entry in found.items() if now >= entry['expires']]
+            for key in expired:
+                del found[key]
+                self.memory.pop(key)
+            if expired:
+                self.backend.delete_many(expired)
+            for key, entry in loaded.items():
+                if key in found:
+                    self._remember(key, entry)
+
+            return [found.get(key) for key in keys]
+
+        except Exception as e:
+            logger.error(f"Cache retrieval error: {e}")
+            return [None] * len(texts)
+
+    def add_many(
+            self,
+            entries: List[Tuple[str, str, EntityColumns, Optional[str]]],
+            ttl_hours: Optional[int] = None,
+            keys: Optional[List[bytes]] = None,
+            classified_on: str = 'raw'
+    ):
+        """Add (original, masked, entities, category) entries and commit once."""
+        try:
+            if keys is None:
+                keys = [self.key_for(original) for original, *_ in entries]
+            new_entries = {
+                key: self._entry(
+                    masked, entities, ttl_hours or self.ttl_hours, category, classified_on
+                )
+                for key, (_, masked, entities, category) in zip(keys, entries)
+            }
+            for key, entry in new_entries.items():
+                self._remember(key, entry)
+            self.backend.put_many(new_entries)
+            self.backend.flush()
+            self._maybe_sweep(time.time())
+
+        except Exception as e:
+            logger.error(f"Cache addition error: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss/eviction counters of the in-memory tier."""
+        return self.memory.stats()
+
     def save_cache(self):
-        """Save cache to file."""
+        """Flush pending writes to storage."""
         try:
-            with open(self.cache_file, 'w') as f:
-                json.dump(self.cache, f, indent=2)
+            self.backend.flush()
         except Exception as e:
             logger.error(f"Cache save error: {e}")
 
-    def load_cache(self):
-        """Load cache from file."""
+    def close(self):
+        """Flush and release the storage backend."""
         try:
-            with open(self.cache_file, 'r') as f:
-                self.cache = json.load(f)
-        except FileNotFoundError:
-            self.cache = {}
+            self._finalizer()
         except Exception as e:
-            logger.error(f"Cache load error: {e}")
-            self.cache = {}
+            logger.error(f"Cache close error: {e}")
 
-    @staticmethod
-    def _hash(text: str) -> str:
-        """Create hash for cache key."""
-        return hashlib.md5(text.encode()).hexdigest()
+    def key_for(self, text: str) -> bytes:
+        """Create the binary cache key for a text; compute it once per request."""
+        return text_digest(text, self.hash_algorithm)
@@ -0,0 +1,146 @@
+import argparse
+import sys
+from collections import Counter
+from typing import List, Optional
+from main import PIIMaskingTool
+from streaming import DEFAULT_MASK_FIELDS, DEFAULT_TEXT_FIELD, READERS, WRITERS, read_records, stream_process, write_records
+from logger import configure_logging, setup_logger
+
+logger = setup_logger(__name__)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Mask PII in and classify emails from mbox, JSONL or CSV files."
+    )
+    parser.add_argument("input", help="Input file (.mbox, .jsonl or .csv)")
+    parser.add_argument(
+        "-o", "--output", default="-",
+        help="Output file, or '-' for stdout (default)"
+    )
+    parser.add_argument(
+        "--input-format", choices=sorted(READERS),
+        help="Input format (inferred from the extension by default)"
+    )
+    parser.add_argument(
+        "--output-format", choices=sorted(WRITERS),
+        help="Output format (csv for .csv outputs, jsonl otherwise)"
+    )
+    parser.add_argument(
+        "--text-field", default=DEFAULT_TEXT_FIELD,
+        help="Field or column holding the email body"
+    )
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Worker processes for detection, masking and classification"
+    )
+    parser.add_argument("--chunk-size", type=int, default=256)
+    parser.add_argument(
+        "--chunk-chars", type=int,
+        help="Scan bodies longer than this many characters in overlapping chunks"
+    )
+    parser.add_argument(
+        "--thread-aware", action="store_true",
+        help="Reuse detection results for quoted reply history"
+    )
+    parser.add_argument(
+        "--normalize", action="store_true",
+        help="Drop control and zero-width characters before detection"
+    )
+    parser.add_argument(
+        "--max-text-length", type=int,
+        help="Validate bodies and treat longer ones per --oversized"
+    )
+    parser.add_argument(
+        "--oversized", choices=("chunk", "reject"), default="chunk",
+        help="Scan bodies over --max-text-length in chunks, or reject them"
+    )
+    parser.add_argument(
+        "--no-classify", action="store_true",
+        help="Only detect and mask; skip loading the classifier"
+    )
+    parser.add_argument(
+        "--classify-masked", action="store_true",
+        help="Classify the masked text instead of the raw email"
+    )
+    parser.add_argument(
+        "--use-cache", action="store_true",
+        help="Look up and store results in the PII cache"
+    )
+    parser.add_argument(
+        "--include-findings", action="store_true",
+        help="Include the detected raw PII values in the output"
+    )
+    parser.add_argument(
+        "--mask-field", action="append", dest="mask_fields",
+        help="Another field to mask besides the body (repeatable; subject is always masked)"
+    )
+    parser.add_argument(
+        "--log-format", choices=("text", "json"), default="text",
+        help="Format of log records written to stderr"
+    )
+    parser.add_argument(
+        "--async-logging", action="store_true",
+        help="Write logs from a background thread, rate-limiting repeated errors"
+    )
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.async_logging or args.log_format == "json":
+        configure_logging(async_mode=args.async_logging, json_format=args.log_format == "json")
+
+    output_format = args.output_format or (
+        'csv' if args.output.lower().endswith('.csv') else 'jsonl'
+    )
+
+    tool = PIIMaskingTool(
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        chunk_chars=args.chunk_chars,
+        thread_aware=args.thread_aware,
+        classify_masked=args.classify_masked,
+        classify=not args.no_classify,
+        normalize=args.normalize,
+        max_text_length=args.max_text_length,
+        oversized=args.oversized
+    )
+    skipped: Counter = Counter()
+    try:
+        records = read_records(args.input, args.input_format, args.text_field)
+        results = stream_process(
+            tool,
+            records,
+            text_field=args.text_field,
+            batch_size=args.batch_size,
+            use_cache=args.use_cache,
+            include_findings=args.include_findings,
+            mask_fields=[*DEFAULT_MASK_FIELDS, *(args.mask_fields or [])],
+            skipped=skipped
+        )
+
+        if args.output == "-":
+            count = write_records(results, sys.stdout, output_format)
+        else:
+            with open(args.output, 'w', encoding='utf-8', newline='') as f:
+                count = write_records(results, f, output_format)
+
+        logger.info(f"Processed {count} emails")
+        if skipped:
+            # Failed and rejected records are missing from the output
+            logger.error(f"Skipped {sum(skipped.values())} emails: {dict(skipped)}")
+            return 1
+        return 0
+
+    except Exception as e:
+        logger.error(f"Streaming error: {e}")
+        return 1
+
+    finally:
+        tool.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+from concurrent.futures import Executor
+from functools import partial
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional
+from detector import PIIDetector, PIIMatch
+from masker import PIIMasker
+from logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Joins a batch of texts into one string for a single scan. No pattern can
+# match across it, and \b and lookbehinds treat it like a string boundary.
+SEPARATOR = '\x00'
+
+TABLE_COLUMNS = ['row', 'type', 'start', 'end', 'value']
+
+
+def _as_texts(texts: Iterable[Any]) -> List[str]:
+    """Column values as strings, with missing values (None/NaN) as empty text."""
+    return [text if isinstance(text, str) else '' for text in texts]
+
+
+def _scan_batch(detector: PIIDetector, texts: List[str], rows: List[int]):
+    """Scan texts joined into one string; return (rows, starts, ends, matches)."""
+    import numpy as np
+
+    joined = SEPARATOR.join(texts)
+    lengths = np.fromiter((len(text) + 1 for text in texts), dtype=np.int64, count=len(texts))
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+
+    matches = detector.scan(joined)
+    starts = np.fromiter((m.start for m in matches), dtype=np.int64, count=len(matches))
+    ends = np.fromiter((m.end for m in matches), dtype=np.int64, count=len(matches))
+    positions = np.searchsorted(offsets, starts, side='right') - 1
+    return (
+        np.asarray(rows, dtype=np.int64)[positions],
+        starts - offsets[positions],
+        ends - offsets[positions],
+        matches
+    )
+
+
+def detect_column(
+        texts: Iterable[Any],
+        detector: Optional[PIIDetector] = None,
+        batch_rows: int = 10000,
+        executor: Optional[Executor] = None
+):
+    """Detect PII in a column of texts and return a long-format DataFrame.
+
+    Columns are row (position in texts), type (categorical, in detector
+    priority order), start, end (offsets within the row's text) and value.
+    Batches are scanned concurrently when an executor (e.g. a process
+    pool) is given.
+    """
+    import numpy as np
+    import pandas as pd
+
+    detector = detector or PIIDetector()
+    texts = _as_texts(texts)
+
+    # Texts that can hold the same PII types share one scan with the
+    # smaller alternation the prefilter picks for them
+    groups: Dict[FrozenSet[str], List[int]] = {}
+    for row, text in enumerate(texts):
+        candidates = detector.prefilter(text)
+        if candidates:
+            groups.setdefault(candidates, []).append(row)
+
+    batches = [
+        rows[first:first + batch_rows]
+        for rows in groups.values()
+        for first in range(0, len(rows), batch_rows)
+    ]
+    batch_texts = ([texts[row] for row in batch] for batch in batches)
+    scan = partial(_scan_batch, detector)
+    scanned = executor.map(scan, batch_texts, batches) if executor else map(scan, batch_texts, batches)
+    parts = [part for part in scanned if part[3]]
+
+    types = pd.CategoricalDtype(list(detector.patterns))
+    if not parts:
+        return pd.DataFrame({
+            'row': np.empty(0, dtype=np.int64),
+            'type': pd.Categorical([], dtype=types),
+            'start': np.empty(0, dtype=np.int32),
+            'end': np.empty(0, dtype=np.int32),
+            'value': np.empty(0, dtype=object)
+        })
+
+    rows = np.concatenate([p[0] for p in parts])
+    starts = np.concatenate([p[1] for p in parts])
+    order = np.lexsort((starts, rows))
+    matches = [m for p in parts for m in p[3]]
+
+    codes = {pii_type: code for code, pii_type in enumerate(types.categories)}
+    type_codes = np.fromiter(
+        (codes[m.pii_type] for m in matches), dtype=np.int8, count=len(matches)
+    )
+    values = np.empty(len(matches), dtype=object)
+    values[:] = [m.value for m in matches]
+    return pd.DataFrame({
+        'row': rows[order],
+        'type': pd.Categorical.from_codes(type_codes[order], dtype=types),
+        'start': starts[order].astype(np.int32),
+        'end': np.concatenate([p[2] for p in parts])[order].astype(np.int32),
+        'value': values[order]
+    }, columns=TABLE_COLUMNS)
+
+
+def mask_column(
+        texts: Iterable[Any],
+        table=None,
+        detector: Optional[PIIDetector] = None,
+        masker: Optional[PIIMasker] = None
+) -> List[str]:
+    """Mask a column of texts, reusing a table from detect_column when given."""
+    texts = _as_texts(texts)
+    if table is None:
+        table = detect_column(texts, detector)
+    masker = masker or PIIMasker()
+
+    masked = list(texts)
+    if table.empty:
+        return masked
+
+    import numpy as np
+
+    # detect_column output is already grouped by row
+    if not table['row'].is_monotonic_increasing:
+        table = table.sort_values(['row', 'start'], kind='stable')
+    rows = table['row'].to_numpy()
+    boundaries = np.concatenate(([0], np.flatnonzero(np.diff(rows)) + 1, [len(rows)])).tolist()
+    types = table['type'].astype(str).tolist()
+    starts = table['start'].tolist()
+    ends = table['end'].tolist()
+    values = table['value'].tolist()
+    for lo, hi in zip(boundaries, boundaries[1:]):
+        row = int(rows[lo])
+        masked[row] = masker.mask_spans(texts[row], [
+            PIIMatch(types[i], starts[i], ends[i], values[i]) for i in range(lo, hi)
+        ])
+    return masked
+
+
+def profile_column(table) -> Any:
+    """Matches per PII type, plus the number of rows each type appears in."""
+    grouped = table.groupby('type', observed=False)
+    return grouped.agg(matches=('row', 'size'), rows=('row', 'nunique'))
@@ -0,0 +1,196 @@
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+from logger import setup_logger
+
+logger = setup_logger(__name__)
+
+COMPACT_MODEL_PATH = "saved_models/email_classifier_compact"
+META_FILE = "meta.json"
+ARRAYS = ('terms', 'idf', 'coef', 'intercept', 'classes')
+
+
+def export_compact(pipeline: Any, out_dir: str = COMPACT_MODEL_PATH):
+    """Save a fitted TF-IDF + linear model pipeline as plain numpy arrays."""
+    vectorizer, clf = pipeline.steps[0][1], pipeline.steps[-1][1]
+    if (
+            vectorizer.analyzer != 'word'
+            or vectorizer.tokenizer is not None
+            or vectorizer.preprocessor is not None
+            or vectorizer.stop_words is not None
+            or vectorizer.strip_accents is not None
+    ):
+        raise ValueError("Only word n-gram vectorizers without custom hooks can be exported")
+
+    # Sorted term array replaces the vocabulary dict; lookups use searchsorted
+    vocabulary = vectorizer.vocabulary_
+    terms = np.array(sorted(vocabulary))
+    order = np.array([vocabulary[term] for term in terms], dtype=np.int64)
+
+    use_idf = getattr(vectorizer, 'use_idf', True)
+    idf = vectorizer.idf_[order] if use_idf else np.ones(len(terms))
+
+    os.makedirs(out_dir, exist_ok=True)
+    arrays = {
+        'terms': terms,
+        'idf': idf.astype(np.float32),
+        # Stored feature-major so a text only touches the rows of its terms
+        'coef': np.ascontiguousarray(clf.coef_[:, order].T, dtype=np.float32),
+        'intercept': np.asarray(clf.intercept_, dtype=np.float32),
+        'classes': np.asarray(clf.classes_).astype(str)
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(out_dir, f"{name}.npy"), array)
+
+    meta = {
+        'token_pattern': vectorizer.token_pattern,
+        'ngram_range': list(vectorizer.ngram_range),
+        'lowercase': vectorizer.lowercase,
+        'binary': vectorizer.binary,
+        'sublinear_tf': getattr(vectorizer, 'sublinear_tf', False),
+        'norm': getattr(vectorizer, 'norm', 'l2')
+    }
+    with open(os.path.join(out_dir, META_FILE), 'w') as f:
+        json.dump(meta, f, indent=2)
+    logger.info(f"Compact model saved to {out_dir}")
+
+
+class CompactModel:
+    """Numpy-only TF-IDF + linear model inference over memory-mapped arrays."""
+
+    def __init__(self, model_dir: str = COMPACT_MODEL_PATH, mmap_mode: Optional[str] = 'r'):
+        with open(os.path.join(model_dir, META_FILE)) as f:
+            self.meta = json.load(f)
+        # Memory-mapped arrays are shared through the page cache by every worker
+        for name in ARRAYS:
+            setattr(self, name, np.load(os.path.join(model_dir, f"{name}.npy"), mmap_mode=mmap_mode))
+
+        self.token_pattern = re.compile(self.meta['token_pattern'])
+        self.min_n, self.max_n = self.meta['ngram_range']
+
+    def analyze(self, text: str) -> List[str]:
+        """Split text into word n-grams the way the training vectorizer did."""
+        if self.meta['lowercase']:
+            text = text.lower()
+        tokens = self.token_pattern.findall(text)
+        if self.max_n == 1:
+            return tokens
+
+        grams = list(tokens) if self.min_n == 1 else []
+        for n in range(max(self.min_n, 2), self.max_n + 1):
+            grams.extend(map(' '.join, zip(*(tokens[i:] for i in range(n)))))
+        return grams
+
+    def decision_function(self, texts: Sequence[str]) -> np.ndarray:
+        """Linear model scores for a batch of texts."""
+        scores = np.zeros((len(texts), len(self.intercept)))
+
+        rows: List[int] = []
+        grams: List[str] = []
+        for row, text in enumerate(texts):
+            text_grams = self.analyze(text)
+            rows.extend([row] * len(text_grams))
+            grams.extend(text_grams)
+
+        if grams:
+            # Look each distinct n-gram up once in the sorted term array
+            slots: Dict[str, int] = {}
+            inverse = np.fromiter(
+                (slots.setdefault(gram, len(slots)) for gram in grams),
+                dtype=np.int64,
+                count=len(grams)
+            )
+            unique_grams = np.array(list(slots))
+            unique_positions = np.searchsorted(self.terms, unique_grams)
+            unique_positions[unique_positions == len(self.terms)] = 0
+            unique_known = self.terms[unique_positions] == unique_grams
+            positions, known = unique_positions[inverse], unique_known[inverse]
+
+            # Term counts per (row, feature), sorted by row
+            n_features = len(self.terms)
+            pairs, counts = np.unique(
+                np.asarray(rows, dtype=np.int64)[known] * n_features + positions[known],
+                return_counts=True
+            )
+            if len(pairs):
+                doc_rows, features = np.divmod(pairs, n_features)
+                weights = np.ones(len(counts)) if self.meta['binary'] else counts.astype(np.float64)
+                if self.meta['sublinear_tf']:
+                    weights = np.log(weights) + 1
+                weights *= self.idf[features]
+
+                norm = self.meta['norm']
+                if norm:
+                    per_row = np.abs(weights) if norm == 'l1' else weights * weights
+                    totals = np.bincount(doc_rows, per_row, minlength=len(texts))
+                    if norm == 'l2':
+                        totals = np.sqrt(totals)
+                    weights /= totals[doc_rows]
+
+                starts = np.flatnonzero(np.r_[True, doc_rows[1:] != doc_rows[:-1]])
+                scores[doc_rows[starts]] = np.add.reduceat(
+                    weights[:, None] * self.coef[features], starts, axis=0
+                )
+
+        scores += self.intercept
+        return scores[:, 0] if scores.shape[1] == 1 else scores
+
+    def predict(self, texts: Sequence[str]) -> np.ndarray:
+        scores = self.decision_function(texts)
+        if scores.ndim == 1:
+            return self.classes[(scores > 0).astype(int)]
+        return self.classes[scores.argmax(axis=1)]
+
+
+def check_agreement(
+        reference: Any,
+        compact: CompactModel,
+        texts: Sequence[str],
+        tolerance: float = 1e-4
+) -> Dict[str, Any]:
+    """Compare compact predictions and scores against the original pipeline."""
+    texts = list(texts)
+    expected = np.asarray(reference.decision_function(texts))
+    actual = compact.decision_function(texts)
+    max_diff = float(np.abs(expected - actual).max()) if len(texts) else 0.0
+    agreement = float(np.mean(
+        np.asarray(reference.predict(texts)).astype(str) == compact.predict(texts)
+    )) if len(texts) else 1.0
+    return {
+        'texts': len(texts),
+        'label_agreement': agreement,
+        'max_score_diff': max_diff,
+        'within_tolerance': max_diff <= tolerance
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from model import MODEL_PATH
+    import joblib
+
+    parser = argparse.ArgumentParser(description="Export the classifier to the compact format.")
+    parser.add_argument("--model-path", default=MODEL_PATH)
+    parser.add_argument("-o", "--output", default=COMPACT_MODEL_PATH)
+    parser.add_argument("--check-data", help="CSV with an 'email' column to compare predictions on")
+    parser.add_argument("--tolerance", type=float, default=1e-4)
+    args = parser.parse_args(argv)
+
+    pipeline = joblib.load(args.model_path)
+    export_compact(pipeline, args.output)
+
+    if args.check_data:
+        with open(args.check_data, newline='', encoding='utf-8') as f:
+            texts = [row['email'] for row in csv.DictReader(f)]
+        report = check_agreement(pipeline, CompactModel(args.output), texts, args.tolerance)
+        print(json.dumps(report, indent=2))
+        return 0 if report['within_tolerance'] else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
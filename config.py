@@ -106,6 +106,20 @@ class Settings(BaseSettings):
         self.CHECKPOINT_DIR.mkdir(parents=True, exist_ok=True)
 
 
-# Initialize settings
-settings = Settings()
-settings.setup_directories()
\ No newline at end of file
+_settings: Optional[Settings] = None
+
+
+def get_settings() -> Settings:
+    """Build the settings and create their directories on first use."""
+    global _settings
+    if _settings is None:
+        _settings = Settings()
+        _settings.setup_directories()
+    return _settings
+
+
+def __getattr__(name: str):
+    # Keeps `from config import settings` working without import-time work
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -1,30 +1,188 @@
 import re
-from typing import List, Dict
+import time
+from typing import List, Dict, FrozenSet, NamedTuple, Optional, Tuple
 
-class PIIDetector:
-    """Detects PII using regex only (no spaCy or LLMs)."""
+# Cheap character-class probes used by the prefilter
+_DIGIT = re.compile(r'\d')
+# full_name needs two adjacent capitalized words, so a capitalized
+# sentence start alone does not enable it
+_NAME_CANDIDATE = re.compile(r'[A-Z][a-z]+\s[A-Z][a-z]')
 
-    def __init__(self):
-        self.patterns = {
-    'full_name': r'\b[A-Z][a-z]+(?:\s[A-Z][a-z]+)+\b',
+# All patterns are merged into a single alternation, so their order
+# is their priority when two of them match at the same position.
+PATTERNS = {
     'email': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b',
-    'phone_number': r'\b(\+91[\-\s]?|0)?[6-9]\d{9}\b',
+    'phone_number': r'(?:(?<![\w+])\+91[\-\s]?|\b0?)[6-9]\d{9}\b',
     'dob': r'\b\d{2}[/-]\d{2}[/-]\d{4}\b',
-    'aadhar_num': r'\b\d{4}[\s-]?\d{4}[\s-]?\d{4}\b',
     'credit_debit_no': r'\b(?:\d[ -]*?){13,16}\b',
-    'cvv_no': r'(?<!\d)(\d{3})(?!\d)',  # 3-digit standalone
-    'expiry_no': r'\b(0[1-9]|1[0-2])\/([0-9]{2,4})\b'
+    'aadhar_num': r'\b\d{4}[\s-]?\d{4}[\s-]?\d{4}\b',
+    'expiry_no': r'\b(?:0[1-9]|1[0-2])\/(?:[0-9]{2,4})\b',
+    'cvv_no': r'(?<!\d)\d{3}(?!\d)',  # 3-digit standalone
+    'full_name': r'\b[A-Z][a-z]+(?:\s[A-Z][a-z]+)+\b'
 }
 
-        
+# Stable ids of the built-in types, used by compact entity records
+PII_TYPES = tuple(PATTERNS)
 
-    def detect(self, text: str) -> Dict[str, List[str]]:
-        findings = {}
+# Equivalent patterns for the linear backend (needs the `regex` package).
+# Possessive quantifiers stop backtracking into separator and letter runs,
+# and email matching starts only at the first word boundary of a
+# local-part run (or of what is left of it after the previous match),
+# instead of re-scanning the run from every character inside it. Every
+# later start in the run would see the same tail, so it could not match
+# where the first one failed. The lookbehinds only look back over the
+# characters since the last word/non-word change.
+LINEAR_PATTERNS = {
+    'email': (
+        r'\b(?:(?=[A-Za-z0-9_])(?<=(?:^|\G(?<!\w)|[^\w.%+-])[.%+-]*)'
+        r'|(?=[.%+-])(?<=(?:\G(?<=\w)|(?![A-Za-z0-9_])\w)[A-Za-z0-9_]*))'
+        r'[A-Za-z0-9._%+-]++@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b'
+    ),
+    'credit_debit_no': r'\b\d(?:[ -]*+\d){12,15}\b',
+    'full_name': r'\b[A-Z][a-z]++(?:\s[A-Z][a-z]++)+\b'
+}
+
+
+def luhn_valid(digits: str) -> bool:
+    """Check a card number's Luhn checksum."""
+    total = 0
+    for i, char in enumerate(reversed(digits)):
+        n = ord(char) - 48
+        if i % 2:
+            n = n * 2 - 9 if n > 4 else n * 2
+        total += n
+    return total % 10 == 0
+
+
+class PIIMatch(NamedTuple):
+    """A detected PII entity with its offsets in the scanned text."""
+
+    pii_type: str
+    start: int
+    end: int
+    value: str
+
+
+class PIIDetector:
+    """Detects PII using regex only (no spaCy or LLMs)."""
 
-        for pii_type, pattern in self.patterns.items():
-            matches = re.findall(pattern, text)
-            if matches:
-                values = ["".join(m) if isinstance(m, tuple) else m for m in matches]
-                findings[pii_type] = values
+    def __init__(self, backend: str = "re", luhn_check: bool = False):
+        if backend not in ("re", "linear"):
+            raise ValueError(f"Unknown detector backend: {backend}")
 
+        self.patterns = dict(PATTERNS)
+        # What each pattern needs in the text before it can possibly match
+        self.requirements = {
+            'email': 'at',
+            'full_name': 'name',
+            'phone_number': 'digit',
+            'dob': 'digit',
+            'credit_debit_no': 'digit',
+            'aadhar_num': 'digit',
+            'expiry_no': 'digit',
+            'cvv_no': 'digit'
+        }
+
+        self.backend = backend
+        # Only treat 13-16 digit numbers as cards when their checksum is valid
+        self.luhn_check = luhn_check
+        if backend == "linear":
+            self.patterns.update(LINEAR_PATTERNS)
+
+        self._engines: Dict[FrozenSet[str], re.Pattern] = {}
+        self.engine = self._engine_for(frozenset(self.patterns))
+        self._single_patterns: Dict[str, re.Pattern] = {}
+
+    @property
+    def _re(self):
+        """The regex module behind the backend (a property so detectors stay picklable)."""
+        if self.backend == "linear":
+            import regex
+
+            return regex
+        return re
+
+    def compile_patterns(self, patterns: Dict[str, str]) -> re.Pattern:
+        """Merge patterns into one compiled alternation of named groups."""
+        return self._re.compile('|'.join(
+            f'(?P<{pii_type}>{pattern})'
+            for pii_type, pattern in patterns.items()
+        ))
+
+    def prefilter(self, text: str, pos: int = 0, endpos: Optional[int] = None) -> FrozenSet[str]:
+        """Return the PII types that could match, from a few C-speed probes."""
+        if endpos is None:
+            endpos = len(text)
+        present = set()
+        if _DIGIT.search(text, pos, endpos):
+            present.add('digit')
+        if text.find('@', pos, endpos) != -1:
+            present.add('at')
+        if _NAME_CANDIDATE.search(text, pos, endpos):
+            present.add('name')
+        return frozenset(
+            pii_type for pii_type, needs in self.requirements.items()
+            if needs in present
+        )
+
+    def _engine_for(self, pii_types: FrozenSet[str]) -> re.Pattern:
+        """Compile (once) an alternation of only the given types, in priority order."""
+        engine = self._engines.get(pii_types)
+        if engine is None:
+            engine = self._engines[pii_types] = self.compile_patterns({
+                pii_type: pattern
+                for pii_type, pattern in self.patterns.items()
+                if pii_type in pii_types
+            })
+        return engine
+
+    def scan(self, text: str, pos: int = 0, endpos: Optional[int] = None) -> List[PIIMatch]:
+        """Scan text (or text[pos:endpos]) once and return typed, non-overlapping matches."""
+        if endpos is None:
+            endpos = len(text)
+        candidates = self.prefilter(text, pos, endpos)
+        if not candidates:
+            return []
+
+        matches = []
+        for m in self._engine_for(candidates).finditer(text, pos, endpos):
+            if (
+                    self.luhn_check
+                    and m.lastgroup == 'credit_debit_no'
+                    and not luhn_valid(re.sub(r'[ -]', '', m.group()))
+            ):
+                # Not a card: look for the other types inside the span instead
+                others = self._engine_for(candidates - {'credit_debit_no'})
+                matches.extend(
+                    PIIMatch(o.lastgroup, o.start(), o.end(), o.group())
+                    for o in others.finditer(text, m.start(), m.end())
+                )
+                continue
+            matches.append(PIIMatch(m.lastgroup, m.start(), m.end(), m.group()))
+        return matches
+
+    @staticmethod
+    def group_matches(matches: List[PIIMatch]) -> Dict[str, List[str]]:
+        """Group matched values by PII type."""
+        findings = {}
+        for match in matches:
+            findings.setdefault(match.pii_type, []).append(match.value)
         return findings
+
+    def profile(self, text: str) -> Dict[str, Tuple[int, float]]:
+        """Run each pattern on its own and return (matches, seconds) per type."""
+        if not self._single_patterns:
+            self._single_patterns = {
+                pii_type: self._re.compile(pattern)
+                for pii_type, pattern in self.patterns.items()
+            }
+
+        results = {}
+        for pii_type, pattern in self._single_patterns.items():
+            started = time.perf_counter()
+            count = sum(1 for _ in pattern.finditer(text))
+            results[pii_type] = (count, time.perf_counter() - started)
+        return results
+
+    def detect(self, text: str) -> Dict[str, List[str]]:
+        return self.group_matches(self.scan(text))
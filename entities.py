@@ -0,0 +1,132 @@
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+from detector import PII_TYPES, PIIMatch
+
+# Built-in types are stored as their index in PII_TYPES; custom types keep
+# their name, so the ids stay valid across processes and cache files
+TYPE_IDS = {pii_type: type_id for type_id, pii_type in enumerate(PII_TYPES)}
+
+TypeRef = Union[int, str]
+
+
+def type_name(type_ref: TypeRef) -> str:
+    """The shared name string for a stored type reference."""
+    return PII_TYPES[type_ref] if type_ref.__class__ is int else type_ref
+
+
+class EntityColumns:
+    """The entities of one text as parallel columns instead of one dict each.
+
+    types holds type ids, starts/ends the offsets, and refs indexes into
+    values, where each distinct value of the text is stored once. Offsets
+    are None for entities loaded from findings-only cache entries.
+    """
+
+    __slots__ = ('types', 'starts', 'ends', 'refs', 'values')
+
+    def __init__(
+            self,
+            types: Optional[List[TypeRef]] = None,
+            starts: Optional[List[Optional[int]]] = None,
+            ends: Optional[List[Optional[int]]] = None,
+            refs: Optional[List[int]] = None,
+            values: Optional[List[str]] = None
+    ):
+        self.types = types if types is not None else []
+        self.starts = starts if starts is not None else []
+        self.ends = ends if ends is not None else []
+        self.refs = refs if refs is not None else []
+        self.values = values if values is not None else []
+
+    def append(self, pii_type: str, start: Optional[int], end: Optional[int], value: str, slots: Dict[str, int]):
+        """Add one entity; slots maps values already stored to their index."""
+        ref = slots.get(value)
+        if ref is None:
+            ref = slots[value] = len(self.values)
+            self.values.append(value)
+        self.types.append(TYPE_IDS.get(pii_type, pii_type))
+        self.starts.append(start)
+        self.ends.append(end)
+        self.refs.append(ref)
+
+    @classmethod
+    def from_matches(cls, matches: Iterable[PIIMatch]) -> 'EntityColumns':
+        columns = cls()
+        slots: Dict[str, int] = {}
+        for match in matches:
+            columns.append(match.pii_type, match.start, match.end, match.value, slots)
+        return columns
+
+    @classmethod
+    def from_entities(cls, entities: Iterable[Dict[str, Any]]) -> 'EntityColumns':
+        """Build columns from list_of_masked_entities dicts."""
+        columns = cls()
+        slots: Dict[str, int] = {}
+        for entity in entities:
+            start, end = entity['position']
+            columns.append(entity['classification'], start, end, entity['entity'], slots)
+        return columns
+
+    @classmethod
+    def from_findings(cls, findings: Dict[str, List[str]]) -> 'EntityColumns':
+        """Build columns, without offsets, from a type -> values findings dict."""
+        columns = cls()
+        slots: Dict[str, int] = {}
+        for pii_type, values in findings.items():
+            for value in values:
+                columns.append(pii_type, None, None, value, slots)
+        return columns
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def __iter__(self) -> Iterator[PIIMatch]:
+        values = self.values
+        for type_ref, start, end, ref in zip(self.types, self.starts, self.ends, self.refs):
+            yield PIIMatch(type_name(type_ref), start, end, values[ref])
+
+    def pairs(self) -> Iterator[tuple]:
+        """(type, value) per entity, without building match records."""
+        values = self.values
+        return ((type_name(type_ref), values[ref]) for type_ref, ref in zip(self.types, self.refs))
+
+    def findings(self) -> Dict[str, List[str]]:
+        """Group values by PII type, like PIIDetector.group_matches."""
+        findings: Dict[str, List[str]] = {}
+        for pii_type, value in self.pairs():
+            findings.setdefault(pii_type, []).append(value)
+        return findings
+
+    def to_entities(self) -> List[Dict[str, Any]]:
+        """Expand to the API's list_of_masked_entities shape."""
+        values = self.values
+        return [
+            {
+                'position': [start, end],
+                'classification': type_name(type_ref),
+                'entity': values[ref]
+            }
+            for type_ref, start, end, ref in zip(self.types, self.starts, self.ends, self.refs)
+            if start is not None
+        ]
+
+    def to_json(self) -> List[list]:
+        """Plain lists for cache serialization."""
+        return [self.types, self.starts, self.ends, self.refs, self.values]
+
+    @classmethod
+    def from_json(cls, data: List[list]) -> 'EntityColumns':
+        return cls(*data)
+
+    def __getstate__(self):
+        return self.to_json()
+
+    def __setstate__(self, state):
+        self.types, self.starts, self.ends, self.refs, self.values = state
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, EntityColumns):
+            return NotImplemented
+        return self.to_json() == other.to_json()
+
+    def __repr__(self) -> str:
+        return f"EntityColumns({list(self)!r})"
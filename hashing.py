@@ -0,0 +1,113 @@
+import hashlib
+import os
+import secrets
+import tempfile
+import time
+from typing import Callable, Dict, Optional
+from logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Cache keys are stored as raw digests of this many bytes
+KEY_DIGEST_SIZE = 16
+
+# Mask tokens carry this many hex characters, e.g. [email]_1a2b3c
+TOKEN_HEX_CHARS = 6
+
+TOKEN_KEY_ENV = "PII_TOKEN_KEY"
+TOKEN_KEY_FILE = "cache/token.key"
+
+
+def _xxh3_128(data: bytes) -> bytes:
+    import xxhash  # optional: pip install xxhash
+
+    return xxhash.xxh3_128_digest(data)
+
+
+# Digest functions for cache keys, by name
+HASHERS: Dict[str, Callable[[bytes], bytes]] = {
+    'blake2b': lambda data: hashlib.blake2b(data, digest_size=KEY_DIGEST_SIZE).digest(),
+    'blake2s': lambda data: hashlib.blake2s(data, digest_size=KEY_DIGEST_SIZE).digest(),
+    'md5': lambda data: hashlib.md5(data).digest(),
+    'xxh3_128': _xxh3_128
+}
+
+
+def text_digest(text: str, algorithm: str = 'blake2b') -> bytes:
+    """Return the compact binary digest of a text."""
+    try:
+        hasher = HASHERS[algorithm]
+    except KeyError:
+        raise ValueError(f"Unknown hash algorithm: {algorithm}")
+    return hasher(text.encode('utf-8', 'surrogatepass'))
+
+
+def _read_key(key_file: str, attempts: int = 5) -> bytes:
+    """Read a key file, retrying while it is still empty."""
+    for attempt in range(attempts):
+        with open(key_file, 'rb') as f:
+            key = f.read()
+        if key:
+            return key
+        # Files written by older versions could be seen before their key
+        time.sleep(0.05 * (attempt + 1))
+    raise ValueError(f"Token key file {key_file} is empty")
+
+
+def load_token_key(key_file: str = TOKEN_KEY_FILE) -> bytes:
+    """Read the token key from the environment or key file, creating the file if needed."""
+    env_key = os.environ.get(TOKEN_KEY_ENV)
+    if env_key:
+        return hashlib.blake2b(env_key.encode()).digest()
+
+    try:
+        return _read_key(key_file)
+    except FileNotFoundError:
+        pass
+
+    key = secrets.token_bytes(32)
+    key_dir = os.path.dirname(key_file) or '.'
+    tmp_file = None
+    try:
+        os.makedirs(key_dir, exist_ok=True)
+        # Write the key in full, then link it into place: other processes
+        # see either no file or the complete key
+        fd, tmp_file = tempfile.mkstemp(dir=key_dir, prefix='.token.key.')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(key)
+            f.flush()
+            os.fsync(f.fileno())
+        os.link(tmp_file, key_file)
+        logger.warning(
+            f"Generated a new token key in {key_file}; set {TOKEN_KEY_ENV} "
+            f"so tokens match across hosts"
+        )
+    except FileExistsError:
+        # Another process created it first; use theirs
+        return _read_key(key_file)
+    except Exception as e:
+        logger.error(f"Token key save error: {e}")
+        logger.warning(f"Using an unsaved token key; set {TOKEN_KEY_ENV} so tokens stay stable")
+    finally:
+        if tmp_file is not None:
+            try:
+                os.unlink(tmp_file)
+            except OSError:
+                pass
+    return key
+
+
+class TokenHasher:
+    """Derives mask token suffixes with keyed BLAKE2."""
+
+    def __init__(self, key: Optional[bytes] = None):
+        self.key = key if key is not None else load_token_key()
+        if not 0 < len(self.key) <= hashlib.blake2b.MAX_KEY_SIZE:
+            raise ValueError("Token key must be 1 to 64 bytes")
+
+    def __call__(self, value: str) -> str:
+        return hashlib.blake2b(
+            value.encode('utf-8', 'surrogatepass'),
+            key=self.key,
+            digest_size=TOKEN_HEX_CHARS // 2
+        ).hexdigest()
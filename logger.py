@@ -1,10 +1,37 @@
+import atexit
 import logging
-from typing import Optional
+import queue
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, List, Optional, Tuple
 import os
 from datetime import datetime
 
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
 
-class ColoredFormatter(logging.Formatter):
+# Loggers created by setup_logger, so configure_logging can rewire them
+_loggers: Dict[str, logging.Logger] = {}
+# Handlers shared by every logger once configure_logging has run
+_shared: Dict[str, Any] = {'handlers': None, 'listener': None, 'filter': None}
+
+
+class ContextFormatter(logging.Formatter):
+    """Formatter that appends per-call context and suppression counts."""
+
+    def format(self, record):
+        message = super().format(record)
+        context = getattr(record, 'context', None)
+        if context:
+            message += ' [' + ' '.join(f'{k}={v}' for k, v in context.items()) + ']'
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            message += f' ({suppressed} similar messages suppressed)'
+        return message
+
+
+class ColoredFormatter(ContextFormatter):
     """Custom formatter with colored output."""
 
     COLORS = {
@@ -32,29 +59,28 @@ def setup_logger(
     """Configure and return a logger instance."""
     logger = logging.getLogger(name)
     logger.setLevel(level)
+    _loggers[name] = logger
 
     if logger.handlers:
         return logger
 
-    # Console handler with colored output
-    console_handler = logging.StreamHandler()
-    console_formatter = ColoredFormatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    console_handler.setFormatter(console_formatter)
-    logger.addHandler(console_handler)
+    if _shared['handlers'] is not None:
+        # configure_logging already ran; join the shared pipeline
+        logger.addFilter(_shared['filter'])
+        for handler in _shared['handlers']:
+            logger.addHandler(handler)
+    else:
+        # Console handler with colored output
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(ColoredFormatter(LOG_FORMAT, datefmt=DATE_FORMAT))
+        logger.addHandler(console_handler)
 
     # File handler if specified
     if log_file:
         try:
             os.makedirs(os.path.dirname(log_file), exist_ok=True)
             file_handler = logging.FileHandler(log_file)
-            file_formatter = logging.Formatter(
-                '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-                datefmt='%Y-%m-%d %H:%M:%S'
-            )
-            file_handler.setFormatter(file_formatter)
+            file_handler.setFormatter(ContextFormatter(LOG_FORMAT, datefmt=DATE_FORMAT))
             logger.addHandler(file_handler)
         except Exception as e:
             logger.error(f"Failed to setup file handler: {e}")
@@ -62,45 +88,193 @@ def setup_logger(
     return logger
 
 
+def json_formatter() -> logging.Formatter:
+    """A python-json-logger formatter; context and suppressed become JSON fields."""
+    try:
+        from pythonjsonlogger.json import JsonFormatter
+    except ImportError:  # python-json-logger < 3
+        from pythonjsonlogger.jsonlogger import JsonFormatter
+
+    return JsonFormatter(
+        '%(asctime)s %(name)s %(levelname)s %(message)s',
+        datefmt=DATE_FORMAT,
+        rename_fields={'levelname': 'level', 'name': 'logger'}
+    )
+
+
+class RateLimitFilter(logging.Filter):
+    """Limits repeated records from one call site, then samples them.
+
+    Each call site may log burst records per interval; after that only every
+    sample_every-th record passes. The next record that passes carries the
+    number suppressed in between as record.suppressed.
+    """
+
+    def __init__(self, burst: int = 10, interval_seconds: float = 60.0, sample_every: int = 100):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval_seconds
+        self.sample_every = max(sample_every, 1)
+        # (pathname, lineno) -> [window start, records in window, suppressed]
+        self.windows: Dict[Tuple[str, int], List] = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = (record.pathname, record.lineno)
+        with self.lock:
+            window = self.windows.get(key)
+            if window is None:
+                window = self.windows[key] = [record.created, 0, 0]
+            elif record.created - window[0] >= self.interval:
+                window[0], window[1] = record.created, 0
+            window[1] += 1
+            over = window[1] - self.burst
+            if over > 0 and over % self.sample_every:
+                window[2] += 1
+                return False
+            if window[2]:
+                record.suppressed, window[2] = window[2], 0
+        return True
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging(
+        async_mode: bool = True,
+        json_format: bool = False,
+        log_file: Optional[str] = None,
+        level: Optional[str] = None,
+        burst: int = 10,
+        interval_seconds: float = 60.0,
+        sample_every: int = 100,
+        queue_size: int = 10000
+):
+    """Send every setup_logger logger through one rate-limited set of handlers.
+
+    With async_mode, callers only put records on a bounded queue and a
+    background QueueListener thread formats and writes them.
+    """
+    shutdown_logging()
+
+    formatter = json_formatter() if json_format else None
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(formatter or ColoredFormatter(LOG_FORMAT, datefmt=DATE_FORMAT))
+    handlers: List[logging.Handler] = [console_handler]
+    if log_file:
+        os.makedirs(os.path.dirname(log_file) or '.', exist_ok=True)
+        file_handler = logging.FileHandler(log_file)
+        file_handler.setFormatter(formatter or ContextFormatter(LOG_FORMAT, datefmt=DATE_FORMAT))
+        handlers.append(file_handler)
+
+    if async_mode:
+        log_queue: queue.Queue = queue.Queue(queue_size)
+        listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        _shared['listener'] = listener
+        handlers = [DroppingQueueHandler(log_queue)]
+
+    # Logger filters run in the calling thread before any handler, so
+    # suppressed records are never formatted or queued
+    rate_limit = RateLimitFilter(burst, interval_seconds, sample_every)
+    previous = _shared['filter']
+    _shared.update(handlers=handlers, filter=rate_limit)
+
+    for logger in _loggers.values():
+        if previous is not None:
+            logger.removeFilter(previous)
+        logger.addFilter(rate_limit)
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+        for handler in handlers:
+            logger.addHandler(handler)
+        if level:
+            logger.setLevel(level)
+
+
+def shutdown_logging():
+    """Stop the background listener after it has written every queued record.
+
+    Loggers then write to the listener's handlers directly.
+    """
+    listener = _shared['listener']
+    if listener is None:
+        return
+    listener.stop()
+    queue_handlers = _shared['handlers']
+    _shared.update(listener=None, handlers=list(listener.handlers))
+    for logger in _loggers.values():
+        for handler in queue_handlers:
+            logger.removeHandler(handler)
+        for handler in listener.handlers:
+            logger.addHandler(handler)
+
+    dropped = sum(handler.dropped for handler in queue_handlers)
+    if dropped:
+        sys.stderr.write(f"Logging queue was full; dropped {dropped} records\n")
+
+
+atexit.register(shutdown_logging)
+
+
 class LoggerWrapper:
     """Wrapper for adding context to logs."""
 
-    def __init__(self, logger: logging.Logger):
+    def __init__(self, logger: logging.Logger, context: Optional[Dict[str, Any]] = None):
         self.logger = logger
-        self.context = {}
+        self.context = dict(context or {})
 
     def add_context(self, **kwargs):
-        """Add context to logs."""
-        self.context.update(kwargs)
+        """Add context to every later log from this wrapper."""
+        # Replaced rather than updated, so other threads never see a dict change size
+        self.context = {**self.context, **kwargs}
 
-    def format_message(self, message: str) -> str:
+    def bind(self, **kwargs) -> 'LoggerWrapper':
+        """A new wrapper with extra context; this one is left unchanged."""
+        return LoggerWrapper(self.logger, {**self.context, **kwargs})
+
+    def format_message(self, message: str, context: Optional[Dict[str, Any]] = None) -> str:
         """Format message with context."""
-        if self.context:
-            context_str = ' '.join(f'{k}={v}' for k, v in self.context.items())
+        context = self.context if context is None else context
+        if context:
+            context_str = ' '.join(f'{k}={v}' for k, v in context.items())
             return f"{message} [{context_str}]"
         return message
 
+    def _log(self, level: int, message: str, kwargs: Dict[str, Any]):
+        # Context from kwargs applies to this call only; formatting waits for
+        # the handler so disabled levels cost a single check
+        if self.logger.isEnabledFor(level):
+            context = {**self.context, **kwargs} if kwargs else self.context
+            self.logger.log(level, message, extra={'context': context}, stacklevel=3)
+
     def debug(self, message: str, **kwargs):
         """Log debug message with context."""
-        self.add_context(**kwargs)
-        self.logger.debug(self.format_message(message))
+        self._log(logging.DEBUG, message, kwargs)
 
     def info(self, message: str, **kwargs):
         """Log info message with context."""
-        self.add_context(**kwargs)
-        self.logger.info(self.format_message(message))
+        self._log(logging.INFO, message, kwargs)
 
     def warning(self, message: str, **kwargs):
         """Log warning message with context."""
-        self.add_context(**kwargs)
-        self.logger.warning(self.format_message(message))
+        self._log(logging.WARNING, message, kwargs)
 
     def error(self, message: str, **kwargs):
         """Log error message with context."""
-        self.add_context(**kwargs)
-        self.logger.error(self.format_message(message))
+        self._log(logging.ERROR, message, kwargs)
 
     def critical(self, message: str, **kwargs):
         """Log critical message with context."""
-        self.add_context(**kwargs)
-        self.logger.critical(self.format_message(message))
\ No newline at end of file
+        self._log(logging.CRITICAL, message, kwargs)
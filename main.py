@@ -1,10 +1,16 @@
-from typing import Dict, Any
+import time
+from typing import Dict, Any, Optional, List, Tuple
 from detector import PIIDetector
+from entities import EntityColumns
 from masker import PIIMasker
 from text_processor import TextProcessor
 from cache_manager import CacheManager
+from metrics import MetricsSink, NULL_METRICS
 from logger import setup_logger
-from models import predict_category  # ✅ Import classification
+from model import EmailClassifier, MODEL_PATH, get_classifier  # ✅ Import classification
+from parallel import ParallelProcessor
+from token_vault import TokenVault
+from validator import InputValidator
 
 logger = setup_logger(__name__)
 
@@ -12,18 +18,77 @@ logger = setup_logger(__name__)
 class PIIMaskingTool:
     """Main class for PII masking functionality."""
 
-    def __init__(self):
+    def __init__(
+            self,
+            classifier: Optional[EmailClassifier] = None,
+            workers: int = 1,
+            chunk_size: int = 256,
+            cache_config: Optional[Dict[str, Any]] = None,
+            metrics: Optional[MetricsSink] = None,
+            profile_every: int = 0,
+            chunk_chars: Optional[int] = None,
+            thread_aware: bool = False,
+            vault: Optional[TokenVault] = None,
+            classify_masked: bool = False,
+            classify: bool = True,
+            normalize: bool = False,
+            max_text_length: Optional[int] = None,
+            oversized: str = 'chunk'
+    ):
         try:
+            # Disabled by default; pass a MetricsRegistry to collect metrics
+            self.metrics = metrics or NULL_METRICS
+
             # Initialize components WITHOUT LLM
             self.detector = PIIDetector()
-            self.masker = PIIMasker()
+            # The vault assigns the tokens, so each one maps to one value
+            self.masker = PIIMasker(vault=vault)
 
             self.processor = TextProcessor(
                 self.detector,
-                self.masker
+                self.masker,
+                metrics=self.metrics,
+                profile_every=profile_every,
+                chunk_chars=chunk_chars,
+                thread_aware=thread_aware,
+                normalize=normalize,
+                # Validation is on when a length limit is given
+                validator=InputValidator(max_text_length) if max_text_length else None,
+                oversized=oversized
             )
 
-            self.cache = CacheManager()
+            self.cache = CacheManager(config=cache_config)
+
+            # Records token -> original so masked text can be restored later
+            self.vault = vault
+
+            # Classify the masked text (shorter, PII-free) instead of the raw one
+            self.classify_masked = classify_masked
+            self.classified_on = 'masked' if classify_masked else 'raw'
+
+            # Loaded once on first prediction and kept resident
+            # classify=False gives a detection-and-masking-only tool that
+            # never loads the model
+            self.classifier: Optional[EmailClassifier] = None
+            if classify:
+                self.classifier = classifier or get_classifier()
+
+            # Fan batches out to worker processes when more than one is asked for
+            self.parallel: Optional[ParallelProcessor] = None
+            if workers > 1:
+                self.parallel = ParallelProcessor(
+                    workers=workers,
+                    chunk_size=chunk_size,
+                    model_path=self.classifier.model_path if classify else MODEL_PATH,
+                    classify=classify,
+                    chunk_chars=chunk_chars,
+                    thread_aware=thread_aware,
+                    token_key=self.masker.token_hasher.key,
+                    classify_masked=classify_masked,
+                    normalize=normalize,
+                    max_text_length=max_text_length,
+                    oversized=oversized
+                )
 
         except Exception as e:
             logger.error(f"Initialization error: {e}")
@@ -35,40 +100,253 @@ class PIIMaskingTool:
             use_cache: bool = True
     ) -> Dict[str, Any]:
         """Process text for PII masking and classification."""
+        metrics = self.metrics
         try:
+            # Rejected input skips the cache, detection and classification
+            if not self.processor.accepts(text):
+                return self._result('', EntityColumns(), 'rejected')
+
             # Check cache
+            # Hash the text once for both the lookup and the write
+            key = self.cache.key_for(text) if use_cache else None
             if use_cache:
-                cached = self.cache.get_from_cache(text)
+                with metrics.timer('stage_seconds', stage='cache_lookup'):
+                    cached = self.cache.get_from_cache(text, key=key)
+                metrics.inc('cache_lookups_total', result='hit' if cached else 'miss')
                 if cached:
-                    return {
-                        'masked_text': cached['masked'],
-                        'findings': cached['findings'],
-                        'source': 'cache',
-                        'category_of_the_email': predict_category(text)  # ✅ Classification
-                    }
+                    entities = self.cache.entities_of(cached)
+                    masked_text = cached['masked']
+                    if self.vault is not None:
+                        masked_text = self._vault_masked(text, masked_text, entities)
+                    category = self._cached_category(cached)
+                    if category is None and self.classifier is not None:
+                        # Entry cached without a category for this mode; add one
+                        with metrics.timer('stage_seconds', stage='classify'):
+                            category = self.classifier.predict(
+                                masked_text if self.classify_masked else text
+                            )
+                        self.cache.add_to_cache(
+                            text,
+                            masked_text,
+                            entities,
+                            key=key,
+                            category=category,
+                            classified_on=self.classified_on
+                        )
+                    return self._result(masked_text, entities, 'cache', category)
 
             # Process text
-            masked_text, findings = self.processor.process(text)
+            masked_text, entities = self.processor.process_detailed(text)
+
+            if self.vault is not None:
+                self.vault.add_entities(entities, self.masker)
 
-            # Cache results
+            category = None
+            if self.classifier is not None:
+                with metrics.timer('stage_seconds', stage='classify'):
+                    category = self.classifier.predict(
+                        masked_text if self.classify_masked else text
+                    )  # ✅ Classification
+
+            # Cache results, category included, so a hit is a pure lookup
             if use_cache:
-                self.cache.add_to_cache(text, masked_text, findings)
+                with metrics.timer('stage_seconds', stage='cache_write'):
+                    self.cache.add_to_cache(
+                        text,
+                        masked_text,
+                        entities,
+                        key=key,
+                        category=category,
+                        classified_on=self.classified_on
+                    )
 
-            return {
-                'masked_text': masked_text,
-                'findings': findings,
-                'source': 'processor',
-                'category_of_the_email': predict_category(text)  # ✅ Classification
-            }
+            return self._result(masked_text, entities, 'processor', category)
 
         except Exception as e:
             logger.error(f"Processing error: {e}")
-            return {
-                'masked_text': text,
-                'findings': {},
-                'source': 'error',
-                'category_of_the_email': "Unknown"
+            metrics.inc('errors_total', stage='process_text')
+            # Never hand back the unmasked text
+            return self._result('', EntityColumns(), 'error', "Unknown")
+
+    def process_batch(
+            self,
+            texts: List[str],
+            use_cache: bool = True
+    ) -> Dict[str, Any]:
+        """Process many texts with one cache pass and one classifier call."""
+        timing: Dict[str, float] = {}
+        started = time.perf_counter()
+        rejected = set()
+        try:
+            # Rejected input skips the cache, detection and classification
+            rejected = {text for text in dict.fromkeys(texts) if not self.processor.accepts(text)}
+            accepted = [text for text in texts if text not in rejected] if rejected else texts
+
+            # Look up every cache key at once, hashing each text only once
+            stage = time.perf_counter()
+            if use_cache:
+                keys = dict(zip(accepted, map(self.cache.key_for, accepted)))
+                found = iter(self.cache.get_many(accepted, [keys[text] for text in accepted]))
+                cached = [None if text in rejected else next(found) for text in texts]
+            else:
+                cached = [None] * len(texts)
+            timing['cache_lookup'] = time.perf_counter() - stage
+
+            # Detect and mask only the misses, once per distinct text
+            stage = time.perf_counter()
+            misses = list(dict.fromkeys(
+                text for text, entry in zip(texts, cached) if not entry and text not in rejected
+            ))
+            processed: Dict[str, Tuple[str, EntityColumns]] = {}
+            categories: Dict[str, str] = {}
+            for text, entry in zip(texts, cached):
+                category = self._cached_category(entry) if entry else None
+                if category is not None:
+                    categories[text] = category
+            if self.parallel and misses:
+                # Workers classify their own chunks as well
+                outputs = self.parallel.process(misses)
+                for text, (masked_text, entities, category) in zip(misses, outputs):
+                    processed[text] = (masked_text, entities)
+                    if category is not None:
+                        categories[text] = category
+            else:
+                for text in misses:
+                    processed[text] = self.processor.process_detailed(text)
+
+            # Entities stay compact until the results are expanded below
+            hits: Dict[str, Tuple[str, EntityColumns]] = {
+                text: (entry['masked'], self.cache.entities_of(entry))
+                for text, entry in zip(texts, cached) if entry
             }
+            if self.vault is not None:
+                # Texts masked in the worker processes or read from the cache
+                # are masked again with the tokens this vault assigns
+                for text in dict.fromkeys(accepted):
+                    if text in hits:
+                        masked_text, entities = hits[text]
+                        hits[text] = (self._vault_masked(text, masked_text, entities), entities)
+                    elif self.parallel:
+                        masked_text, entities = processed[text]
+                        processed[text] = (self._vault_masked(text, masked_text, entities), entities)
+                    else:
+                        self.vault.add_entities(processed[text][1], self.masker)
+            results: List[Dict[str, Any]] = [
+                self._result(*hits[text], 'cache') if text in hits
+                else self._result(*processed[text], 'processor') if text in processed
+                else self._result('', EntityColumns(), 'rejected')
+                for text in texts
+            ]
+            timing['process'] = time.perf_counter() - stage
+
+            # Classify the remaining texts in a single vectorized call
+            stage = time.perf_counter()
+            pending = {}
+            if self.classifier is not None:
+                for text, result in zip(texts, results):
+                    if text not in categories and text not in rejected:
+                        pending[text] = result['masked_text'] if self.classify_masked else text
+                try:
+                    categories.update(zip(pending, self.classifier.predict_many(list(pending.values()))))
+                except Exception as e:
+                    logger.error(f"Classification error: {e}")
+            default = "Unknown" if self.classifier is not None else None
+            for text, result in zip(texts, results):
+                result['category_of_the_email'] = None if text in rejected else categories.get(text, default)
+            timing['classify'] = time.perf_counter() - stage
+
+            # Persist the cache once for the whole batch: new results, and
+            # hits that just got their category
+            stage = time.perf_counter()
+            if use_cache:
+                for text, entry in zip(texts, cached):
+                    if entry and text in pending and text in categories:
+                        processed[text] = hits[text]
+                # Failed classifications are stored without a category
+                self.cache.add_many(
+                    [
+                        (text, masked_text, entities, categories.get(text))
+                        for text, (masked_text, entities) in processed.items()
+                    ],
+                    keys=[keys[text] for text in processed],
+                    classified_on=self.classified_on
+                )
+            timing['cache_write'] = time.perf_counter() - stage
+
+        except Exception as e:
+            logger.error(f"Batch processing error: {e}")
+            self.metrics.inc('errors_total', stage='process_batch')
+            # Never hand back the unmasked texts
+            results = [self._result('', EntityColumns(), 'error', "Unknown") for _ in texts]
+
+        timing['total'] = time.perf_counter() - started
+
+        if self.metrics.enabled:
+            for stage_name, seconds in timing.items():
+                self.metrics.observe('batch_stage_seconds', seconds, stage=stage_name)
+            if use_cache:
+                hits = sum(1 for result in results if result['source'] == 'cache')
+                looked_up = sum(1 for text in texts if text not in rejected)
+                self.metrics.inc('cache_lookups_total', hits, result='hit')
+                self.metrics.inc('cache_lookups_total', looked_up - hits, result='miss')
+
+        return {'results': results, 'timing': timing}
+
+    @staticmethod
+    def _result(
+            masked_text: str,
+            entities: EntityColumns,
+            source: str,
+            category: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Build an output record, expanding the compact entities."""
+        return {
+            'masked_text': masked_text,
+            'findings': entities.findings(),
+            'entities': entities.to_entities(),
+            'source': source,
+            'category_of_the_email': category
+        }
+
+    def mask_text(self, text: str) -> str:
+        """Detect and mask PII in a short field, without classifying or caching it."""
+        try:
+            masked_text, entities = self.processor.process_detailed(text)
+            if self.vault is not None:
+                self.vault.add_entities(entities, self.masker)
+            return masked_text
+        except Exception as e:
+            logger.error(f"Masking error: {e}")
+            self.metrics.inc('errors_total', stage='mask_text')
+            return ''
+
+    def _vault_masked(self, text: str, masked_text: str, entities: EntityColumns) -> str:
+        """Record entities in the vault and return text masked with the vault's tokens."""
+        self.vault.add_entities(entities, self.masker)
+        # Entries cached without offsets keep the text they were masked with
+        if not entities or None in entities.starts:
+            return masked_text
+        return self.masker.mask_spans(text, entities)
+
+    def _cached_category(self, entry: Dict[str, Any]) -> Optional[str]:
+        """The entry's category, if it was predicted from the text this tool classifies."""
+        if entry.get('classified_on', 'raw') == self.classified_on:
+            return entry.get('category')
+        return None
+
+    def unmask(self, masked_text: str) -> str:
+        """Restore the original values behind the tokens in a masked text."""
+        if self.vault is None:
+            raise ValueError("PIIMaskingTool was created without a TokenVault")
+        return self.vault.unmask(masked_text)
+
+    def close(self):
+        """Release worker processes and flush the cache and vault."""
+        if self.parallel:
+            self.parallel.close()
+        self.cache.close()
+        if self.vault is not None:
+            self.vault.close()
 
 
 if __name__ == "__main__":
@@ -81,3 +359,4 @@ if __name__ == "__main__":
     print(f"\nMasked text: {result['masked_text']}")
     print(f"Detected entities: {result['findings']}")
     print(f"Email Category: {result['category_of_the_email']}")
+    tool.close()
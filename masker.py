@@ -1,5 +1,8 @@
-from typing import Dict, List
-import hashlib
+from typing import Dict, List, Iterable, Optional
+from detector import PIIMatch
+from hashing import TokenHasher
+from memory_cache import BoundedCache
+from token_vault import TokenVault
 from logger import setup_logger
 import re
 
@@ -9,7 +12,12 @@ logger = setup_logger(__name__)
 class PIIMasker:
     """Masks detected PII in text."""
 
-    def __init__(self):
+    def __init__(
+            self,
+            hash_cache_size: int = 100000,
+            token_key: Optional[bytes] = None,
+            vault: Optional[TokenVault] = None
+    ):
         self.mask_patterns = {
             'full_name': '[full_name]',
             'email': '[email]',
@@ -20,37 +28,66 @@ class PIIMasker:
             'cvv_no': '[cvv_no]',
             'expiry_no': '[expiry_no]'
         }
-        self.hash_cache = {}
+        # Bounded so long-running workers do not grow without limit
+        self.hash_cache = BoundedCache(max_entries=hash_cache_size)
+        # Keyed, so tokens cannot be matched against hashes of guessed values
+        self.token_hasher = TokenHasher(token_key)
+        # With a vault attached, tokens are registered as they are made and
+        # colliding values get distinct tokens, so unmasking is exact
+        self.vault = vault
 
-    def mask(self, text: str, findings: Dict[str, List[str]]) -> str:
-        """Mask detected PII in text using span-based replacement."""
+    def token_for(self, pii_type: str, value: str) -> str:
+        """Return the consistent masked token for a value."""
+        token = self.hash_cache.get(value)
+        if token is None:
+            mask = self.mask_patterns.get(pii_type, '[MASKED]')
+            token = f"{mask}_{self.token_hasher(value)}"
+            if self.vault is not None:
+                token = self.vault.assign(token, value)
+            self.hash_cache.put(value, token)
+        return token
+
+    def mask_spans(self, text: str, matches: Iterable[PIIMatch]) -> str:
+        """Mask offset-bearing matches in a single linear pass."""
         try:
-            spans = []
+            pieces = []
+            last_end = 0
 
-            for pii_type, instances in findings.items():
-                mask = self.mask_patterns.get(pii_type, '[MASKED]')
-                for val in instances:
-                    if not val or val.strip() == "":
-                        continue
+            # Earliest start wins; on ties the longest span wins
+            for match in sorted(matches, key=lambda m: (m.start, -m.end)):
+                if match.start < last_end or not match.value.strip():
+                    continue
+                pieces.append(text[last_end:match.start])
+                pieces.append(self.token_for(match.pii_type, match.value))
+                last_end = match.end
 
-                    # Get consistent masked value
-                    if val not in self.hash_cache:
-                        hash_val = hashlib.md5(val.encode()).hexdigest()[:6]
-                        self.hash_cache[val] = f"{mask}_{hash_val}"
+            pieces.append(text[last_end:])
+            return ''.join(pieces)
 
-                    # Find all occurrences using regex to avoid partial matches
-                    for match in re.finditer(re.escape(val), text):
-                        spans.append((match.start(), match.end(), self.hash_cache[val]))
+        except Exception as e:
+            logger.error(f"Masking error: {e}")
+            raise
 
-            # Sort spans from back to front
-            spans.sort(key=lambda x: x[0], reverse=True)
+    def mask(self, text: str, findings: Dict[str, List[str]]) -> str:
+        """Mask detected PII values (without offsets) in text."""
+        try:
+            types = {}
+            for pii_type, instances in findings.items():
+                for val in instances:
+                    if val and val.strip():
+                        types.setdefault(val, pii_type)
 
-            # Replace in reverse order
-            masked_text = text
-            for start, end, replacement in spans:
-                masked_text = masked_text[:start] + replacement + masked_text[end:]
+            if not types:
+                return text
 
-            return masked_text
+            # Locate every value in one scan, preferring longer values
+            values = sorted(types, key=len, reverse=True)
+            pattern = re.compile('|'.join(map(re.escape, values)))
+            matches = [
+                PIIMatch(types[m.group()], m.start(), m.end(), m.group())
+                for m in pattern.finditer(text)
+            ]
+            return self.mask_spans(text, matches)
 
         except Exception as e:
             logger.error(f"Masking error: {e}")
@@ -0,0 +1,170 @@
+import sys
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+def approx_size(value: Any) -> int:
+    """Roughly estimate the memory held by a cached value, in bytes."""
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            approx_size(k) + approx_size(v) for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(approx_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class BoundedCache:
+    """In-memory LRU (or LFU) cache bounded by entry count and/or bytes."""
+
+    def __init__(
+            self,
+            max_entries: Optional[int] = None,
+            max_bytes: Optional[int] = None,
+            policy: str = "lru",
+            sizeof: Callable[[Any], int] = approx_size
+    ):
+        if policy not in ("lru", "lfu"):
+            raise ValueError(f"Unknown eviction policy: {policy}")
+
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.sizeof = sizeof
+
+        self.data: Dict[Hashable, Any] = {}
+        self.sizes: Dict[Hashable, int] = {}
+        self.total_bytes = 0
+
+        # LRU keeps keys in recency order; LFU keeps one such bucket per
+        # use count so the least frequently used key is found in O(1).
+        self.order: "OrderedDict[Hashable, None]" = OrderedDict()
+        self.freq: Dict[Hashable, int] = {}
+        self.buckets: Dict[int, "OrderedDict[Hashable, None]"] = {}
+        self.min_freq = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.data
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a cached value and mark it as used."""
+        if key not in self.data:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._touch(key)
+        return self.data[key]
+
+    def put(self, key: Hashable, value: Any):
+        """Insert or replace a value, evicting others to stay within limits."""
+        size = self.sizeof(key) + self.sizeof(value) if self.max_bytes is not None else 0
+        if key in self.data:
+            self.total_bytes -= self.sizes.get(key, 0)
+            self._touch(key)
+        else:
+            self._make_room(size)
+            self._track(key)
+
+        self.data[key] = value
+        if self.max_bytes is not None:
+            self.sizes[key] = size
+            self.total_bytes += size
+
+        # A replaced value may have grown past the byte limit
+        self._evict(keep=key)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove a key without counting it as an eviction."""
+        if key not in self.data:
+            return default
+        self._untrack(key)
+        self.total_bytes -= self.sizes.pop(key, 0)
+        return self.data.pop(key)
+
+    def clear(self):
+        self.data.clear()
+        self.sizes.clear()
+        self.order.clear()
+        self.freq.clear()
+        self.buckets.clear()
+        self.total_bytes = 0
+        self.min_freq = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss/eviction counters and current usage."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self.data),
+            'bytes': self.total_bytes
+        }
+
+    def _over_limit(self) -> bool:
+        if self.max_entries is not None and len(self.data) > self.max_entries:
+            return True
+        return self.max_bytes is not None and self.total_bytes > self.max_bytes
+
+    def _make_room(self, incoming: int):
+        """Evict until one more entry of the given size fits."""
+        while self.data and (
+                (self.max_entries is not None and len(self.data) >= self.max_entries)
+                or (self.max_bytes is not None
+                    and self.total_bytes + incoming > self.max_bytes)
+        ):
+            self.pop(self._victim())
+            self.evictions += 1
+
+    def _evict(self, keep: Hashable):
+        while self._over_limit() and len(self.data) > 1:
+            victim = self._victim()
+            if victim == keep:
+                break
+            self.pop(victim)
+            self.evictions += 1
+
+    def _victim(self) -> Hashable:
+        if self.policy == "lru":
+            return next(iter(self.order))
+        return next(iter(self.buckets[self.min_freq]))
+
+    def _track(self, key: Hashable):
+        if self.policy == "lru":
+            self.order[key] = None
+        else:
+            self.freq[key] = 1
+            self.buckets.setdefault(1, OrderedDict())[key] = None
+            self.min_freq = 1
+
+    def _untrack(self, key: Hashable):
+        if self.policy == "lru":
+            del self.order[key]
+            return
+        count = self.freq.pop(key)
+        bucket = self.buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self.buckets[count]
+            if self.min_freq == count:
+                self.min_freq = min(self.buckets, default=0)
+
+    def _touch(self, key: Hashable):
+        if self.policy == "lru":
+            self.order.move_to_end(key)
+            return
+        count = self.freq[key]
+        bucket = self.buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self.buckets[count]
+            if self.min_freq == count:
+                self.min_freq = count + 1
+        self.freq[key] = count + 1
+        self.buckets.setdefault(count + 1, OrderedDict())[key] = None
@@ -0,0 +1,157 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+# Default histogram buckets: stage durations (seconds) and text sizes (chars)
+TIME_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+_NULL_TIMER = nullcontext()
+
+
+class MetricsSink:
+    """Receives metric events. This base sink discards them at no cost."""
+
+    enabled = False
+
+    def inc(self, name: str, value: float = 1, **labels: str):
+        """Increase a counter."""
+
+    def observe(self, name: str, value: float, **labels: str):
+        """Record one observation in a histogram."""
+
+    def timer(self, name: str, **labels: str):
+        """Context manager observing the wall time of its block in seconds."""
+        return _NULL_TIMER
+
+
+NULL_METRICS = MetricsSink()
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry(MetricsSink):
+    """In-process metrics registry with a Prometheus text dump."""
+
+    enabled = True
+
+    def __init__(self, buckets: Optional[Dict[str, Sequence[float]]] = None):
+        self.counters: Dict[str, Dict[LabelSet, float]] = {}
+        self.histograms: Dict[str, Dict[LabelSet, Histogram]] = {}
+        self.bucket_overrides = buckets or {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _labels(labels: Dict[str, str]) -> LabelSet:
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def _buckets_for(self, name: str) -> Sequence[float]:
+        if name in self.bucket_overrides:
+            return self.bucket_overrides[name]
+        return SIZE_BUCKETS if name.endswith('_chars') else TIME_BUCKETS
+
+    def inc(self, name: str, value: float = 1, **labels: str):
+        key = self._labels(labels)
+        with self.lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: str):
+        key = self._labels(labels)
+        with self.lock:
+            series = self.histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(self._buckets_for(name))
+            histogram.observe(value)
+
+    @contextmanager
+    def _timed(self, name: str, labels: Dict[str, str]) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def timer(self, name: str, **labels: str):
+        return self._timed(name, labels)
+
+    def counter_value(self, name: str, **labels: str) -> float:
+        return self.counters.get(name, {}).get(self._labels(labels), 0)
+
+    def cache_hit_ratio(self) -> Optional[float]:
+        """Share of cache lookups that were hits, if any lookups happened."""
+        hits = self.counter_value('cache_lookups_total', result='hit')
+        misses = self.counter_value('cache_lookups_total', result='miss')
+        total = hits + misses
+        return hits / total if total else None
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Return a plain-dict copy of every metric."""
+        with self.lock:
+            return {
+                'counters': {
+                    name: {self._format_labels(k): v for k, v in series.items()}
+                    for name, series in self.counters.items()
+                },
+                'histograms': {
+                    name: {
+                        self._format_labels(k): {'count': h.count, 'sum': h.sum}
+                        for k, h in series.items()
+                    }
+                    for name, series in self.histograms.items()
+                },
+                'cache_hit_ratio': self.cache_hit_ratio()
+            }
+
+    @staticmethod
+    def _format_labels(labels: LabelSet, extra: LabelSet = ()) -> str:
+        pairs = labels + extra
+        if not pairs:
+            return ''
+        escaped = (
+            (k, v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+            for k, v in pairs
+        )
+        return '{' + ','.join(f'{k}="{v}"' for k, v in escaped) + '}'
+
+    def to_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+        with self.lock:
+            for name, series in sorted(self.counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in series.items():
+                    lines.append(f"{name}{self._format_labels(labels)} {value}")
+
+            for name, series in sorted(self.histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for labels, h in series.items():
+                    cumulative = 0
+                    for bound, count in zip(h.buckets, h.counts):
+                        cumulative += count
+                        le = (('le', repr(float(bound))),)
+                        lines.append(f"{name}_bucket{self._format_labels(labels, le)} {cumulative}")
+                    lines.append(
+                        f"{name}_bucket{self._format_labels(labels, (('le', '+Inf'),))} {h.count}"
+                    )
+                    lines.append(f"{name}_sum{self._format_labels(labels)} {h.sum}")
+                    lines.append(f"{name}_count{self._format_labels(labels)} {h.count}")
+        return '\n'.join(lines) + '\n'
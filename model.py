@@ -1,39 +1,66 @@
-import pandas as pd
-import joblib
-from sklearn.model_selection import train_test_split
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
-from sklearn.pipeline import Pipeline
-from sklearn.metrics import classification_report
+import os
+from typing import List, Optional, Sequence
 
 MODEL_PATH = "saved_models/email_classifier.pkl"
 
+
 def train_model(data_path: str = "combined_emails_with_natural_pii.csv"):
-    """Train and save a simple text classification model."""
-    df = pd.read_csv(data_path)
+    """Train and save a simple text classification model (see training.py)."""
+    from training import train_model as train
+
+    train(data_path)
+
+
+class EmailClassifier:
+    """Keeps the trained classification pipeline resident in memory."""
+
+    def __init__(
+            self,
+            model_path: str = MODEL_PATH,
+            mmap_mode: Optional[str] = None
+    ):
+        self.model_path = model_path
+        self.mmap_mode = mmap_mode
+        self._model = None
+
+    @property
+    def model(self):
+        """Load the pipeline on first use and keep it for later calls."""
+        if self._model is None:
+            # Imported here so masking-only processes never load numpy or sklearn
+            if os.path.isdir(self.model_path):
+                # Compact export (see compact_model.py): memory-mapped numpy arrays
+                from compact_model import CompactModel
+
+                self._model = CompactModel(self.model_path, mmap_mode=self.mmap_mode or 'r')
+            else:
+                import joblib
+
+                self._model = joblib.load(self.model_path, mmap_mode=self.mmap_mode)
+        return self._model
 
-    X = df["email"]
-    y = df["type"]
+    def predict(self, email_text: str) -> str:
+        """Predict the category of a single email."""
+        return self.predict_many([email_text])[0]
 
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, stratify=y, random_state=42
-    )
+    def predict_many(self, texts: Sequence[str]) -> List[str]:
+        """Predict categories for a batch of emails in one vectorized call."""
+        if not texts:
+            return []
+        return list(self.model.predict(list(texts)))
 
-    pipeline = Pipeline([
-        ('tfidf', TfidfVectorizer(max_features=5000, ngram_range=(1,2))),
-        ('clf', LogisticRegression(max_iter=1000))
-    ])
 
-    pipeline.fit(X_train, y_train)
-    y_pred = pipeline.predict(X_test)
+_default_classifier: Optional[EmailClassifier] = None
 
-    print("Classification Report:\n", classification_report(y_test, y_pred))
 
-    joblib.dump(pipeline, MODEL_PATH)
-    print(f"✅ Model saved to: {MODEL_PATH}")
+def get_classifier() -> EmailClassifier:
+    """Return the process-wide classifier, creating it on first use."""
+    global _default_classifier
+    if _default_classifier is None:
+        _default_classifier = EmailClassifier()
+    return _default_classifier
 
 
 def predict_category(email_text: str) -> str:
-    """Load model and predict the category of an email."""
-    model = joblib.load(MODEL_PATH)
-    return model.predict([email_text])[0]
+    """Predict the category of an email with the resident model."""
+    return get_classifier().predict(email_text)
@@ -0,0 +1,94 @@
+import re
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Tuple
+from detector import PIIMatch
+
+# Control, format and zero-width characters are dropped before detection:
+# they split PII the patterns would otherwise see (j\u200bohn@mail.com)
+_DROPPED = [
+    *range(0x00, 0x09), *range(0x0e, 0x20), *range(0x7f, 0x85), *range(0x86, 0xa0),
+    0xad, 0x200b, 0x200c, 0x200d, 0x2060, 0xfeff
+]
+
+# One-for-one replacements, so they never move offsets
+_REPLACED: Dict[int, str] = {
+    **{cp: ' ' for cp in (0x0b, 0x0c, 0x85, 0xa0, 0x1680, *range(0x2000, 0x200b), 0x202f, 0x205f, 0x3000)},
+    **{cp: '-' for cp in (*range(0x2010, 0x2016), 0x2212, 0xfe63, 0xff0d)},
+    # Devanagari and fullwidth digits
+    **{0x0966 + n: str(n) for n in range(10)},
+    **{0xff10 + n: str(n) for n in range(10)},
+    0xff0b: '+',
+    0xff0f: '/',
+    0xff20: '@'
+}
+
+NORMALIZE_TABLE = {**_REPLACED, **dict.fromkeys(_DROPPED)}
+_DROPPED_RUN = re.compile('[' + ''.join(f'\\U{cp:08x}' for cp in _DROPPED) + ']+')
+
+
+class OffsetMap:
+    """Maps offsets in normalized text back to the text it came from."""
+
+    __slots__ = ('positions', 'shifts')
+
+    def __init__(self, text: str):
+        # Normalized position of each dropped run, and the characters
+        # dropped up to and including it
+        self.positions: List[int] = []
+        self.shifts: List[int] = []
+        dropped = 0
+        for m in _DROPPED_RUN.finditer(text):
+            self.positions.append(m.start() - dropped)
+            dropped += m.end() - m.start()
+            self.shifts.append(dropped)
+
+    def to_original(self, start: int, end: int) -> Tuple[int, int]:
+        # Runs right before a span's start are skipped; runs right after its
+        # end are not part of it
+        i = bisect_right(self.positions, start) - 1
+        j = bisect_left(self.positions, end) - 1
+        return (
+            start + (self.shifts[i] if i >= 0 else 0),
+            end + (self.shifts[j] if j >= 0 else 0)
+        )
+
+
+def normalize(text: str) -> Tuple[str, Optional[OffsetMap]]:
+    """Normalize text for detection in one translate pass.
+
+    The offset map is None when no characters were dropped, in which case
+    offsets in both texts are the same.
+    """
+    normalized = text.translate(NORMALIZE_TABLE)
+    if len(normalized) == len(text):
+        return normalized, None
+    return normalized, OffsetMap(text)
+
+
+def to_original(text: str, matches: List[PIIMatch], offsets: Optional[OffsetMap]) -> List[PIIMatch]:
+    """Move matches found in normalized text onto the original text and its values."""
+    mapped = []
+    for match in matches:
+        start, end = offsets.to_original(match.start, match.end) if offsets else (match.start, match.end)
+        mapped.append(PIIMatch(match.pii_type, start, end, text[start:end]))
+    return mapped
+
+
+def merge_matches(text: str, original: List[PIIMatch], normalized: List[PIIMatch]) -> List[PIIMatch]:
+    """Combine matches from the original and the normalized scan of text.
+
+    Dropping a character can also join words and hide a \\b the original
+    scan relied on, so neither scan covers the other. Overlapping spans
+    are merged into one covering both, typed after the longer of them, so
+    everything either scan found stays masked.
+    """
+    merged: List[PIIMatch] = []
+    for match in sorted((*original, *normalized), key=lambda m: (m.start, -m.end)):
+        if merged and match.start < merged[-1].end:
+            last = merged[-1]
+            if match.end > last.end:
+                pii_type = last.pii_type if last.end - last.start >= match.end - match.start else match.pii_type
+                merged[-1] = PIIMatch(pii_type, last.start, match.end, text[last.start:match.end])
+            continue
+        merged.append(match)
+    return merged
@@ -0,0 +1,149 @@
+import os
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from detector import PIIDetector
+from entities import EntityColumns
+from masker import PIIMasker
+from text_processor import TextProcessor
+from validator import InputValidator
+from model import EmailClassifier, MODEL_PATH
+from logger import setup_logger
+
+if TYPE_CHECKING:
+    # Imported lazily at runtime: multiprocessing is slow to import
+    from concurrent.futures import ProcessPoolExecutor
+
+logger = setup_logger(__name__)
+
+# Per-process state, built once by the pool initializer
+_worker: Dict[str, object] = {}
+
+
+def _init_worker(
+        model_path: str,
+        classify: bool,
+        chunk_chars: Optional[int] = None,
+        thread_aware: bool = False,
+        token_key: Optional[bytes] = None,
+        classify_masked: bool = False,
+        normalize: bool = False,
+        max_text_length: Optional[int] = None,
+        oversized: str = 'chunk'
+):
+    """Create the detector, masker and classifier once per worker process."""
+    _worker['processor'] = TextProcessor(
+        PIIDetector(),
+        PIIMasker(token_key=token_key),
+        chunk_chars=chunk_chars,
+        thread_aware=thread_aware,
+        normalize=normalize,
+        validator=InputValidator(max_text_length) if max_text_length else None,
+        oversized=oversized
+    )
+    _worker['classifier'] = EmailClassifier(model_path) if classify else None
+    _worker['classify_masked'] = classify_masked
+
+
+def _process_chunk(texts: List[str]) -> List[Tuple[str, EntityColumns, Optional[str]]]:
+    """Detect, mask and classify one chunk of texts inside a worker."""
+    processor: TextProcessor = _worker['processor']
+    classifier: Optional[EmailClassifier] = _worker['classifier']
+
+    processed = [processor.process_detailed(text) for text in texts]
+
+    # None marks texts the caller still has to classify
+    categories: List[Optional[str]] = [None] * len(texts)
+    if classifier is not None:
+        try:
+            if _worker['classify_masked']:
+                categories = classifier.predict_many([masked for masked, _ in processed])
+            else:
+                categories = classifier.predict_many(texts)
+        except Exception as e:
+            logger.error(f"Classification error: {e}")
+
+    return [
+        (masked_text, entities, category)
+        for (masked_text, entities), category in zip(processed, categories)
+    ]
+
+
+class ParallelProcessor:
+    """Fans chunks of emails out to a pool of worker processes."""
+
+    def __init__(
+            self,
+            workers: Optional[int] = None,
+            chunk_size: int = 256,
+            model_path: str = MODEL_PATH,
+            classify: bool = True,
+            chunk_chars: Optional[int] = None,
+            thread_aware: bool = False,
+            token_key: Optional[bytes] = None,
+            classify_masked: bool = False,
+            normalize: bool = False,
+            max_text_length: Optional[int] = None,
+            oversized: str = 'chunk'
+    ):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.model_path = model_path
+        self.classify = classify
+        self.chunk_chars = chunk_chars
+        self.thread_aware = thread_aware
+        # Shared with the workers so every process derives the same tokens
+        self.token_key = token_key
+        self.classify_masked = classify_masked
+        self.normalize = normalize
+        self.max_text_length = max_text_length
+        self.oversized = oversized
+        self._executor: Optional["ProcessPoolExecutor"] = None
+
+    @property
+    def executor(self) -> "ProcessPoolExecutor":
+        """Start the pool on first use so idle instances cost nothing."""
+        if self._executor is None:
+            from concurrent.futures import ProcessPoolExecutor
+
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(
+                    self.model_path,
+                    self.classify,
+                    self.chunk_chars,
+                    self.thread_aware,
+                    self.token_key,
+                    self.classify_masked,
+                    self.normalize,
+                    self.max_text_length,
+                    self.oversized
+                )
+            )
+        return self._executor
+
+    def process(self, texts: List[str]) -> List[Tuple[str, EntityColumns, Optional[str]]]:
+        """Return (masked_text, entities, category) per text, in input order."""
+        chunks = [
+            texts[i:i + self.chunk_size]
+            for i in range(0, len(texts), self.chunk_size)
+        ]
+
+        results: List[Tuple[str, EntityColumns, Optional[str]]] = []
+        for chunk_results in self.executor.map(_process_chunk, chunks):
+            results.extend(chunk_results)
+        return results
+
+    def close(self):
+        """Shut down the worker pool."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
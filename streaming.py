@@ -0,0 +1,223 @@
+import csv
+import json
+import sys
+import email
+from collections import Counter
+from email import policy
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO
+from logger import setup_logger
+
+logger = setup_logger(__name__)
+
+Record = Dict[str, Any]
+
+# Column of combined_emails_with_natural_pii.csv holding the email body
+DEFAULT_TEXT_FIELD = "email"
+
+# Fields besides the body that can hold PII and are masked in the output
+DEFAULT_MASK_FIELDS = ('subject',)
+
+# Result sources with no masked body; these records are skipped, not written
+SKIPPED_SOURCES = ('error', 'rejected')
+
+
+def _message_body(message: email.message.EmailMessage) -> str:
+    """Return the plain-text body of a parsed message."""
+    part = message.get_body(preferencelist=('plain',))
+    if part is None:
+        return ""
+    try:
+        return part.get_content()
+    except Exception as e:
+        logger.error(f"Message decode error: {e}")
+        payload = part.get_payload(decode=True) or b""
+        return payload.decode('utf-8', errors='replace')
+
+
+def iter_mbox(path: str, text_field: str = DEFAULT_TEXT_FIELD) -> Iterator[Record]:
+    """Yield messages from an mbox file one at a time."""
+    def parse(lines: List[bytes], index: int) -> Record:
+        message = email.message_from_bytes(b"".join(lines), policy=policy.default)
+        return {
+            'id': message.get('Message-ID') or index,
+            'subject': message.get('Subject', ''),
+            text_field: _message_body(message)
+        }
+
+    index = 0
+    lines: List[bytes] = []
+    with open(path, 'rb') as f:
+        for line in f:
+            # Each message starts with a "From " separator line
+            if line.startswith(b"From "):
+                if lines:
+                    yield parse(lines, index)
+                    index += 1
+                lines = []
+                continue
+            # Undo mboxrd quoting of body lines that begin with "From "
+            if line.startswith(b">") and line.lstrip(b">").startswith(b"From "):
+                line = line[1:]
+            lines.append(line)
+        if lines:
+            yield parse(lines, index)
+
+
+def iter_jsonl(path: str, text_field: str = DEFAULT_TEXT_FIELD) -> Iterator[Record]:
+    """Yield records from a JSON Lines file, skipping malformed lines."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.error(f"Skipping malformed JSON on line {line_no}: {e}")
+                continue
+            if text_field not in record:
+                logger.error(f"Skipping line {line_no}: missing '{text_field}'")
+                continue
+            yield record
+
+
+def iter_csv(path: str, text_field: str = DEFAULT_TEXT_FIELD) -> Iterator[Record]:
+    """Yield rows from a CSV file such as combined_emails_with_natural_pii.csv."""
+    # Email bodies can exceed the csv module's default field limit
+    csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.DictReader(f)
+        if reader.fieldnames is None or text_field not in reader.fieldnames:
+            raise ValueError(f"CSV file has no '{text_field}' column")
+        yield from reader
+
+
+READERS = {
+    'mbox': iter_mbox,
+    'jsonl': iter_jsonl,
+    'csv': iter_csv
+}
+
+
+def detect_format(path: str) -> str:
+    """Guess the input format from a file extension."""
+    for fmt, extensions in (
+            ('mbox', ('.mbox', '.mbx')),
+            ('jsonl', ('.jsonl', '.ndjson')),
+            ('csv', ('.csv',))
+    ):
+        if path.lower().endswith(extensions):
+            return fmt
+    raise ValueError(f"Cannot infer input format from '{path}'")
+
+
+def read_records(
+        path: str,
+        fmt: Optional[str] = None,
+        text_field: str = DEFAULT_TEXT_FIELD
+) -> Iterator[Record]:
+    """Open an input file lazily with the reader for its format."""
+    return READERS[fmt or detect_format(path)](path, text_field=text_field)
+
+
+def batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Group an iterable into lists of at most size items."""
+    if size < 1:
+        raise ValueError("batch size must be at least 1")
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def stream_process(
+        tool,
+        records: Iterable[Record],
+        text_field: str = DEFAULT_TEXT_FIELD,
+        batch_size: int = 500,
+        use_cache: bool = False,
+        include_findings: bool = False,
+        mask_fields: Iterable[str] = DEFAULT_MASK_FIELDS,
+        skipped: Optional[Counter] = None
+) -> Iterator[Record]:
+    """Mask and classify records in bounded batches, yielding output records.
+
+    Output records keep every input field except the original text, which
+    is replaced by ``masked_email`` and ``category_of_the_email``. Text in
+    ``mask_fields`` (the mbox subject by default) is masked too. Raw PII
+    values are only included when ``include_findings`` is set.
+
+    Records that failed or were rejected are not yielded; they are counted
+    by source in ``skipped`` when a Counter is given.
+    """
+    mask_fields = [field for field in mask_fields if field != text_field]
+    for batch in batched(records, batch_size):
+        texts = [str(record.get(text_field) or "") for record in batch]
+        results = tool.process_batch(texts, use_cache=use_cache)['results']
+
+        for record, result in zip(batch, results):
+            if result['source'] in SKIPPED_SOURCES:
+                logger.error(f"Skipping record {record.get('id', '')!s}: {result['source']}")
+                if skipped is not None:
+                    skipped[result['source']] += 1
+                continue
+            output = {k: v for k, v in record.items() if k != text_field}
+            for field in mask_fields:
+                if isinstance(output.get(field), str) and output[field]:
+                    output[field] = tool.mask_text(output[field])
+            output['masked_email'] = result['masked_text']
+            output['category_of_the_email'] = result['category_of_the_email']
+            if include_findings:
+                output['findings'] = result['findings']
+            yield output
+
+
+class JSONLWriter:
+    """Writes output records incrementally as JSON Lines."""
+
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+
+    def write(self, record: Record):
+        self.stream.write(json.dumps(record, ensure_ascii=False, default=str))
+        self.stream.write("\n")
+
+
+class CSVWriter:
+    """Writes output records incrementally as CSV.
+
+    The header is taken from the first record; nested values are JSON encoded.
+    """
+
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+        self.writer: Optional[csv.DictWriter] = None
+
+    def write(self, record: Record):
+        if self.writer is None:
+            self.writer = csv.DictWriter(
+                self.stream, fieldnames=list(record), extrasaction='ignore'
+            )
+            self.writer.writeheader()
+        self.writer.writerow({
+            k: json.dumps(v, ensure_ascii=False) if isinstance(v, (dict, list)) else v
+            for k, v in record.items()
+        })
+
+
+WRITERS = {
+    'jsonl': JSONLWriter,
+    'csv': CSVWriter
+}
+
+
+def write_records(records: Iterable[Record], stream: TextIO, fmt: str = 'jsonl') -> int:
+    """Write records one at a time and return how many were written."""
+    writer = WRITERS[fmt](stream)
+    count = 0
+    for record in records:
+        writer.write(record)
+        count += 1
+    return count
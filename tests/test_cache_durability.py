@@ -0,0 +1,28 @@
+import gc
+import pytest
+from cache_manager import CacheManager
+from entities import EntityColumns
+
+
+@pytest.mark.parametrize("name", ["cache.db", "cache.json"])
+def test_single_write_survives_without_close(tmp_path, name):
+    cache_file = str(tmp_path / name)
+    cache = CacheManager(cache_file=cache_file)
+    cache.add_to_cache("Hi Rahul Sharma", "Hi [full_name]_000000", EntityColumns())
+    del cache
+    gc.collect()
+
+    reopened = CacheManager(cache_file=cache_file)
+    assert reopened.get_from_cache("Hi Rahul Sharma")['masked'] == "Hi [full_name]_000000"
+    reopened.close()
+
+
+def test_writes_are_flushed_within_the_interval(tmp_path):
+    cache_file = str(tmp_path / "cache.db")
+    cache = CacheManager(cache_file=cache_file, config={'flush_interval_seconds': 0})
+    cache.add_to_cache("Hi Rahul Sharma", "masked", EntityColumns())
+
+    other = CacheManager(cache_file=cache_file)
+    assert other.get_from_cache("Hi Rahul Sharma") is not None
+    other.close()
+    cache.close()
@@ -0,0 +1,23 @@
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor
+import pytest
+from cache_manager import CacheManager
+from hashing import TOKEN_KEY_ENV, load_token_key
+
+
+def test_concurrent_first_loads_share_one_key(tmp_path, monkeypatch):
+    monkeypatch.delenv(TOKEN_KEY_ENV, raising=False)
+    key_file = str(tmp_path / "cache" / "token.key")
+
+    with ProcessPoolExecutor(max_workers=8) as pool:
+        keys = list(pool.map(load_token_key, [key_file] * 32))
+
+    assert len(keys[0]) == 32
+    assert set(keys) == {keys[0]}
+    assert sorted(p.name for p in (tmp_path / "cache").iterdir()) == ["token.key"]
+
+
+@pytest.mark.skipif(importlib.util.find_spec("xxhash") is not None, reason="xxhash is installed")
+def test_unavailable_hash_algorithm_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        CacheManager(cache_file=str(tmp_path / "cache.db"), config={'hash_algorithm': 'xxh3_128'})
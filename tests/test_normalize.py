@@ -0,0 +1,54 @@
+import random
+import pytest
+from detector import PIIDetector
+from masker import PIIMasker
+from text_processor import TextProcessor
+
+JOINED_BY_DROPPED = [
+    "Call\u200b9876543210 now",
+    "Aadhar\xad1234 5678 9012",
+    "card\u200b4321-5678-9876-1234",
+    "Mail\u200brahul.sharma92@gmail.com, DOB\u200c15/08/1995",
+]
+
+SAMPLE = (
+    "Rahul Sharma can be reached at rahul.sharma92@gmail.com or +919008583823. "
+    "His Aadhar is 1234 5678 9012, and DOB is 15/08/1995. "
+    "Card: 4321-5678-9876-1234, CVV 123, Expiry: 09/26."
+)
+
+
+def covered(matches):
+    return {i for m in matches for i in range(m.start, m.end)}
+
+
+def assert_superset(text):
+    detector, masker = PIIDetector(), PIIMasker()
+    _, plain = TextProcessor(detector, masker).process_matches(text)
+    _, normalized = TextProcessor(detector, masker, normalize=True).process_matches(text)
+
+    assert covered(plain) <= covered(normalized)
+
+
+@pytest.mark.parametrize("text", JOINED_BY_DROPPED)
+def test_normalize_masks_everything_the_default_path_masks(text):
+    assert_superset(text)
+
+
+@pytest.mark.parametrize("text", JOINED_BY_DROPPED)
+def test_normalize_leaves_no_raw_value(text):
+    detector, masker = PIIDetector(), PIIMasker()
+    _, plain = TextProcessor(detector, masker).process_matches(text)
+    masked, _ = TextProcessor(detector, masker, normalize=True).process_matches(text)
+
+    for match in plain:
+        assert match.value not in masked
+
+
+def test_normalize_is_a_superset_with_random_dropped_characters():
+    rng = random.Random(24)
+    for _ in range(300):
+        chars = list(SAMPLE)
+        for _ in range(rng.randint(1, 8)):
+            chars.insert(rng.randrange(len(chars) + 1), rng.choice('\u200b\u200c\xad\ufeff'))
+        assert_superset(''.join(chars))
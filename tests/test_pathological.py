@@ -0,0 +1,38 @@
+import random
+import time
+import pytest
+from benchmark import PATHOLOGICAL_INPUTS
+from detector import PIIDetector
+
+pytest.importorskip("regex")
+
+SIZE = 50000
+# The default backend needs minutes on some of these inputs
+TIME_LIMIT_SECONDS = 1.0
+
+
+@pytest.mark.parametrize("name", sorted(PATHOLOGICAL_INPUTS))
+def test_linear_backend_time_is_bounded(name):
+    text = PATHOLOGICAL_INPUTS[name](SIZE)
+    detector = PIIDetector(backend="linear", luhn_check=True)
+
+    started = time.perf_counter()
+    detector.scan(text)
+    assert time.perf_counter() - started < TIME_LIMIT_SECONDS
+
+
+def test_linear_backend_matches_default_on_random_text():
+    rng = random.Random(20000)
+    alphabet = "_-.%+@aZq09 s.é\nAb-_1234+91"
+    default, linear = PIIDetector(), PIIDetector(backend="linear")
+
+    for _ in range(20000):
+        text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 50)))
+        text += rng.choice(['', '@x.co', '@9s.ZZ', '+919876543210.a@x.co'])
+        pos = rng.randint(0, 3)
+        assert linear.scan(text, pos) == default.scan(text, pos), repr(text)
+
+
+def test_linear_email_keeps_leading_underscore():
+    matches = PIIDetector(backend="linear").scan('_-R%-+0a@9s.ZZ')
+    assert [m.value for m in matches] == ['_-R%-+0a@9s.ZZ']
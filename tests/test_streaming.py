@@ -0,0 +1,61 @@
+from collections import Counter
+import pytest
+from main import PIIMaskingTool
+from streaming import stream_process
+
+RECORDS = [
+    {'id': 1, 'email': "Rahul Sharma card 4321-5678-9876-1234"},
+    {'id': 2, 'email': "Reach me at rahul.sharma92@gmail.com"}
+]
+
+
+@pytest.fixture
+def tool(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    tool = PIIMaskingTool(classify=False)
+    yield tool
+    tool.close()
+
+
+def test_failed_batch_never_returns_raw_text(tool, monkeypatch):
+    def broken(text):
+        raise RuntimeError("worker pool broken")
+
+    monkeypatch.setattr(tool.processor, 'process_detailed', broken)
+    results = tool.process_batch([record['email'] for record in RECORDS])['results']
+
+    assert [result['source'] for result in results] == ['error', 'error']
+    assert all(result['masked_text'] == '' for result in results)
+
+
+def test_stream_skips_and_counts_failed_records(tool, monkeypatch):
+    def broken(text):
+        raise RuntimeError("worker pool broken")
+
+    monkeypatch.setattr(tool.processor, 'process_detailed', broken)
+    skipped = Counter()
+    outputs = list(stream_process(tool, RECORDS, skipped=skipped))
+
+    assert outputs == []
+    assert skipped == {'error': 2}
+
+
+def test_stream_writes_masked_records(tool):
+    skipped = Counter()
+    outputs = list(stream_process(tool, RECORDS, skipped=skipped))
+
+    assert [output['id'] for output in outputs] == [1, 2]
+    assert "4321-5678-9876-1234" not in outputs[0]['masked_email']
+    assert "rahul.sharma92@gmail.com" not in outputs[1]['masked_email']
+    assert not skipped
+
+
+def test_detection_errors_are_reported_not_unmasked(tool, monkeypatch):
+    def broken(text, pos=0):
+        raise RuntimeError("detector failed")
+
+    monkeypatch.setattr(tool.detector, 'scan', broken)
+
+    assert tool.process_text(RECORDS[0]['email'], use_cache=False)['source'] == 'error'
+    results = tool.process_batch([RECORDS[0]['email']], use_cache=False)['results']
+    assert results[0]['source'] == 'error' and results[0]['masked_text'] == ''
@@ -0,0 +1,30 @@
+import pytest
+from detector import PIIDetector
+from masker import PIIMasker
+from text_processor import TextProcessor
+
+SIGNATURE_THREADS = [
+    'Thanks\nRahul Sharma\nAadhar 1234\n5678 9012\n\nOn Mon, Priya wrote:\n> Thanks\n> Rahul Sharma',
+    '> Thanks\n> Rahul Sharma',
+    'Ok\n\nOn Tue, Anita wrote:\n> Regards\n> Anita Rao\n> 98765\n> 43210 or 9876543210\n>> Best\n>> Vikram Singh\n>> vikram@example.com',
+    'Call me\nRahul\nSharma\n> Card 4321 5678\n> 9876 1234\n> Cheers\n> Priya Nair',
+]
+
+
+@pytest.mark.parametrize("text", SIGNATURE_THREADS)
+def test_thread_aware_matches_plain_path(text):
+    detector, masker = PIIDetector(), PIIMasker()
+    plain = TextProcessor(detector, masker)
+    thread_aware = TextProcessor(detector, masker, thread_aware=True)
+
+    assert thread_aware.process_matches(text) == plain.process_matches(text)
+
+
+def test_quoted_blocks_are_reused():
+    detector, masker = PIIDetector(), PIIMasker()
+    processor = TextProcessor(detector, masker, thread_aware=True)
+    text = SIGNATURE_THREADS[2]
+
+    first = processor.process_matches(text)
+    assert processor.process_matches(text) == first
+    assert processor.process_matches(text) == TextProcessor(detector, masker).process_matches(text)
@@ -0,0 +1,72 @@
+import hashlib
+import pytest
+from detector import PIIMatch
+from hashing import TOKEN_KEY_ENV, TokenHasher
+from main import PIIMaskingTool
+from masker import PIIMasker
+from token_vault import TokenVault
+
+TOKEN_KEY = hashlib.blake2b(b'test-key').digest()
+
+
+def colliding_emails():
+    """Two distinct emails whose truncated token digests are equal."""
+    hasher = TokenHasher(TOKEN_KEY)
+    seen = {}
+    i = 0
+    while True:
+        value = f"user{i}@example.com"
+        digest = hasher(value)
+        if digest in seen:
+            return seen[digest], value
+        seen[digest] = value
+        i += 1
+
+
+def email_matches(text, *values):
+    return [PIIMatch('email', text.index(v), text.index(v) + len(v), v) for v in values]
+
+
+def test_colliding_values_round_trip():
+    first, second = colliding_emails()
+    vault = TokenVault()
+    masker = PIIMasker(token_key=TOKEN_KEY, vault=vault)
+    text = f"From {first} to {second}"
+
+    masked = masker.mask_spans(text, email_matches(text, first, second))
+
+    assert masker.token_for('email', first) != masker.token_for('email', second)
+    assert vault.collisions == 1
+    assert vault.unmask(masked) == text
+
+
+def test_numbered_tokens_survive_eviction():
+    first, second = colliding_emails()
+    masker = PIIMasker(hash_cache_size=1, token_key=TOKEN_KEY, vault=TokenVault())
+    tokens = [masker.token_for('email', first), masker.token_for('email', second)]
+
+    assert [masker.token_for('email', first), masker.token_for('email', second)] == tokens
+
+
+def test_plain_token_before_digits_is_restored():
+    vault = TokenVault()
+    token = vault.assign('[email]_1a2b3c', 'rahul@example.com')
+
+    assert vault.unmask(f"{token}_2") == 'rahul@example.com_2'
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_tool_round_trips_colliding_values(tmp_path, monkeypatch, workers):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv(TOKEN_KEY_ENV, 'test-key')
+    first, second = colliding_emails()
+    texts = [f"Mail {first} please", f"Mail {second} please"]
+
+    tool = PIIMaskingTool(classify=False, workers=workers, vault=TokenVault())
+    try:
+        results = tool.process_batch(texts)['results']
+        assert [tool.unmask(result['masked_text']) for result in results] == texts
+        # Cache hits come back with the same tokens
+        assert tool.process_batch(texts)['results'][1]['masked_text'] == results[1]['masked_text']
+    finally:
+        tool.close()
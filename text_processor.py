@@ -1,10 +1,37 @@
-from typing import Dict, Tuple
-from detector import PIIDetector
+from bisect import bisect_right
+from collections import Counter
+from concurrent.futures import Executor
+from functools import partial
+from typing import Dict, Iterator, List, Optional, Tuple
+from detector import PIIDetector, PIIMatch
+from entities import EntityColumns
+from hashing import text_digest
 from masker import PIIMasker
+from normalizer import merge_matches, normalize, to_original
+from memory_cache import BoundedCache
+from thread_splitter import LINE_SEPARATOR, ThreadBlock, has_quotes, split_thread
+from metrics import MetricsSink, NULL_METRICS
+from validator import InputValidator
 from logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Characters kept before each chunk so lookbehinds and \b see real context
+WINDOW_CONTEXT = 16
+
+# (window text, scan start, core end, window offset in the full text)
+Window = Tuple[str, int, int, int]
+
+
+def scan_window(detector: PIIDetector, window: Window) -> List[PIIMatch]:
+    """Scan one chunk window and return the matches starting in its core, at absolute offsets."""
+    chunk, pos, core_end, offset = window
+    return [
+        PIIMatch(m.pii_type, m.start + offset, m.end + offset, m.value)
+        for m in detector.scan(chunk, pos)
+        if m.start < core_end
+    ]
+
 
 class TextProcessor:
     """Coordinates PII detection and masking process (Regex Only)."""
@@ -12,22 +39,257 @@ class TextProcessor:
     def __init__(
             self,
             detector: PIIDetector,
-            masker: PIIMasker
+            masker: PIIMasker,
+            metrics: Optional[MetricsSink] = None,
+            profile_every: int = 0,
+            chunk_chars: Optional[int] = None,
+            overlap_chars: int = 1024,
+            executor: Optional[Executor] = None,
+            thread_aware: bool = False,
+            block_cache_size: int = 10000,
+            normalize: bool = False,
+            validator: Optional[InputValidator] = None,
+            oversized: str = 'chunk'
     ):
+        if chunk_chars is not None and chunk_chars < 1:
+            raise ValueError("chunk_chars must be at least 1")
+        if oversized not in ('chunk', 'reject'):
+            raise ValueError(f"Unknown oversized policy: {oversized}")
+
         self.detector = detector
         self.masker = masker
+        self.metrics = metrics or NULL_METRICS
+        # Time every pattern separately on one text out of profile_every
+        self.profile_every = profile_every
+        self.processed = 0
+
+        # Texts longer than chunk_chars are scanned in windows that reach
+        # overlap_chars past each chunk, so matches up to that length are
+        # never cut at a boundary
+        self.chunk_chars = chunk_chars
+        self.overlap_chars = overlap_chars
+        # Optional pool for scanning windows concurrently
+        self.executor = executor
+
+        # Reply chains repeat their quoted history, so detection results
+        # are cached per quoted block and only new blocks are scanned
+        self.thread_aware = thread_aware
+        self.block_cache = BoundedCache(max_entries=block_cache_size)
+
+        # Drop control and zero-width characters and fold look-alike
+        # spaces, dashes and digits before detection; spans still point
+        # into the original text
+        self.normalize = normalize
+
+        # Invalid input is rejected before any regex runs. Input over the
+        # validator's length limit is rejected too, or scanned in chunks
+        # of at most that size with oversized='chunk'
+        self.validator = validator
+        self.oversized = oversized
+        if validator is not None and oversized == 'chunk':
+            self.chunk_chars = min(chunk_chars or validator.max_text_length, validator.max_text_length)
+
+    def accepts(self, text: str) -> bool:
+        """Check text against the validator, counting rejections by reason."""
+        validator = self.validator
+        if validator is None:
+            return True
+        if isinstance(text, str) and len(text) > validator.max_text_length:
+            if self.oversized == 'chunk':
+                return True
+            logger.warning(f"Rejected text of {len(text)} characters")
+            reason = 'oversized'
+        elif validator.validate_text(text):
+            return True
+        else:
+            reason = 'invalid'
+        self.metrics.inc('inputs_rejected_total', reason=reason)
+        return False
+
+    def process_matches(self, text: str) -> Tuple[str, List[PIIMatch]]:
+        """Process text and return the masked text with offset-bearing matches.
+
+        Rejected input comes back as empty text, never unscanned, and
+        errors are raised rather than returning the text unmasked.
+        """
+        if not self.accepts(text):
+            return '', []
 
-    def process(self, text: str) -> Tuple[str, Dict]:
-        """Process text to detect and mask PII."""
         try:
-            # Detect PII using regex patterns
-            pii_findings = self.detector.detect(text)
+            metrics = self.metrics
+
+            if self.normalize:
+                with metrics.timer('stage_seconds', stage='normalize'):
+                    normalized, offsets = normalize(text)
+                if normalized != text:
+                    # The original text is scanned too, so normalizing never
+                    # masks less than the default path
+                    with metrics.timer('stage_seconds', stage='detect'):
+                        matches = merge_matches(
+                            text,
+                            self.detect(text),
+                            to_original(text, self.detect(normalized), offsets)
+                        )
+                    with metrics.timer('stage_seconds', stage='mask'):
+                        masked_text = self.masker.mask_spans(text, matches) if matches else text
+                    if metrics.enabled:
+                        self._record(text, matches)
+                    return masked_text, matches
+
+            if self.thread_aware and has_quotes(text):
+                with metrics.timer('stage_seconds', stage='detect'):
+                    matches = self.scan_thread(text)
+                with metrics.timer('stage_seconds', stage='mask'):
+                    masked_text = self.masker.mask_spans(text, matches) if matches else text
+                if metrics.enabled:
+                    self._record(text, matches)
+                return masked_text, matches
+
+            if self.chunk_chars and len(text) > self.chunk_chars:
+                matches: List[PIIMatch] = []
+                with metrics.timer('stage_seconds', stage='chunked'):
+                    masked_text = ''.join(self.iter_masked(text, matches))
+                if metrics.enabled:
+                    self._record(text, matches)
+                return masked_text, matches
+
+            # Detect PII in a single scan
+            with metrics.timer('stage_seconds', stage='detect'):
+                matches = self.detector.scan(text)
 
-            # Mask PII entities
-            masked_text = self.masker.mask(text, pii_findings)
+            # Mask the detected spans directly, without searching again
+            if matches:
+                with metrics.timer('stage_seconds', stage='mask'):
+                    masked_text = self.masker.mask_spans(text, matches)
+            else:
+                masked_text = text
 
-            return masked_text, pii_findings
+            if metrics.enabled:
+                self._record(text, matches)
+
+            return masked_text, matches
 
         except Exception as e:
             logger.error(f"Text processing error: {e}")
-            return text, {}
+            # Callers report the failure; unmasked text is never returned
+            raise
+
+    def detect(self, text: str) -> List[PIIMatch]:
+        """Detect matches by thread block when thread-aware, else with scan."""
+        if self.thread_aware and has_quotes(text):
+            return self.scan_thread(text)
+        return self.scan(text)
+
+    def scan(self, text: str) -> List[PIIMatch]:
+        """Detect matches in one piece of text, in chunks when it is long."""
+        if self.chunk_chars and len(text) > self.chunk_chars:
+            return [m for _, chunk_matches in self.scan_chunks(text) for m in chunk_matches]
+        return self.detector.scan(text)
+
+    def scan_thread(self, text: str) -> List[PIIMatch]:
+        """Detect matches block by block, reusing results for quoted blocks seen before."""
+        matches: List[PIIMatch] = []
+        for block in split_thread(text):
+            content = block.content(text)
+            key = text_digest(content)
+            block_matches = self.block_cache.get(key)
+            if block_matches is None:
+                block_matches = self.scan(content)
+                self.block_cache.put(key, block_matches)
+                self.metrics.inc('thread_blocks_total', result='miss')
+            else:
+                self.metrics.inc('thread_blocks_total', result='hit')
+            matches.extend(self._to_text_offsets(block, block_matches))
+        return matches
+
+    @staticmethod
+    def _to_text_offsets(block: ThreadBlock, matches: List[PIIMatch]) -> List[PIIMatch]:
+        """Map matches in a block's content back to offsets in the full text."""
+        if not matches:
+            return []
+        if block.depth == 0:
+            # Unquoted blocks are scanned as the real text
+            return [
+                PIIMatch(m.pii_type, m.start + block.start, m.end + block.start, m.value)
+                for m in matches
+            ]
+
+        # Where each line starts in the content, one separator after the last
+        starts = []
+        offset = 0
+        for _, content_start, end in block.lines:
+            starts.append(offset)
+            offset += end - content_start + len(LINE_SEPARATOR)
+
+        mapped = []
+        for match in matches:
+            i = bisect_right(starts, match.start) - 1
+            start = block.lines[i][1] + match.start - starts[i]
+            mapped.append(PIIMatch(match.pii_type, start, start + len(match.value), match.value))
+        return mapped
+
+    def _window(self, text: str, start: int, pos: int) -> Window:
+        """Cut the window for the chunk starting at start, scanning from pos."""
+        core_end = min(start + self.chunk_chars, len(text))
+        lead = max(0, start - WINDOW_CONTEXT)
+        chunk = text[lead:core_end + self.overlap_chars]
+        return chunk, pos - lead, core_end - lead, lead
+
+    def scan_chunks(self, text: str) -> Iterator[Tuple[int, List[PIIMatch]]]:
+        """Yield (chunk end, matches) per chunk, with the same matches as one whole-text scan."""
+        starts = range(0, len(text), self.chunk_chars)
+        if self.executor is not None:
+            windows = [self._window(text, start, start) for start in starts]
+            scanned = self.executor.map(partial(scan_window, self.detector), windows)
+        else:
+            scanned = (None for _ in starts)
+
+        last_end = 0
+        for start, matches in zip(starts, scanned):
+            # A match running over from the previous chunk moves the scan
+            # start, exactly as it would in a single pass
+            if matches is None or last_end > start:
+                matches = scan_window(self.detector, self._window(text, start, max(start, last_end)))
+            if matches:
+                last_end = matches[-1].end
+            yield min(start + self.chunk_chars, len(text)), matches
+
+    def iter_masked(self, text: str, matches: Optional[List[PIIMatch]] = None) -> Iterator[str]:
+        """Yield the masked text piece by piece, chunk by chunk.
+
+        Detected matches are appended to matches when a list is given.
+        """
+        emitted = 0
+        for chunk_end, chunk_matches in self.scan_chunks(text):
+            for match in chunk_matches:
+                if match.value.strip():
+                    yield text[emitted:match.start]
+                    yield self.masker.token_for(match.pii_type, match.value)
+                    emitted = match.end
+            if matches is not None:
+                matches.extend(chunk_matches)
+            if chunk_end > emitted:
+                yield text[emitted:chunk_end]
+                emitted = chunk_end
+
+    def _record(self, text: str, matches: List[PIIMatch]):
+        """Record text size, per-type match counts and sampled pattern timings."""
+        metrics = self.metrics
+        metrics.observe('text_size_chars', len(text))
+        for pii_type, count in Counter(m.pii_type for m in matches).items():
+            metrics.inc('pii_matches_total', count, pii_type=pii_type)
+
+        self.processed += 1
+        if self.profile_every and self.processed % self.profile_every == 0:
+            for pii_type, (_, seconds) in self.detector.profile(text).items():
+                metrics.observe('pattern_scan_seconds', seconds, pii_type=pii_type)
+
+    def process(self, text: str) -> Tuple[str, Dict]:
+        """Process text to detect and mask PII."""
+        masked_text, matches = self.process_matches(text)
+        return masked_text, self.detector.group_matches(matches)
+
+    def process_detailed(self, text: str) -> Tuple[str, EntityColumns]:
+        """Process text and also return its entities with their positions."""
+        masked_text, matches = self.process_matches(text)
+        return masked_text, EntityColumns.from_matches(matches)
@@ -0,0 +1,65 @@
+import re
+from typing import List, NamedTuple, Tuple
+
+# Leading quote markers of a reply line, e.g. "> ", ">>" or "> > "
+QUOTE_PREFIX = re.compile(r'[ \t]*(?:>[ \t]?)+')
+# Reply attribution line, e.g. "On Mon, 3 Jun 2024, Priya <p@x.com> wrote:"
+ATTRIBUTION = re.compile(r'On\b.*\bwrote:\s*$')
+
+# Joins the stripped lines of a quoted block. No pattern matches across it,
+# so a match never spans two lines that have a quote prefix between them
+LINE_SEPARATOR = '\x00'
+
+# (line start, content start after the quote prefix, line end)
+Line = Tuple[int, int, int]
+
+
+class ThreadBlock(NamedTuple):
+    """A run of lines at one quote depth: the new message or one quoted section."""
+
+    depth: int
+    lines: List[Line]
+
+    @property
+    def start(self) -> int:
+        return self.lines[0][0]
+
+    @property
+    def end(self) -> int:
+        return self.lines[-1][2]
+
+    def content(self, text: str) -> str:
+        """The block's text, with quote prefixes stripped from every line of a quoted block."""
+        if self.depth == 0:
+            return text[self.start:self.end]
+        return LINE_SEPARATOR.join(text[content_start:end] for _, content_start, end in self.lines)
+
+
+def has_quotes(text: str) -> bool:
+    """Cheap check for quoted history before splitting a text."""
+    return text.startswith('>') or '\n>' in text or 'wrote:' in text
+
+
+def split_thread(text: str) -> List[ThreadBlock]:
+    """Split an email into blocks at quote-depth changes and attribution lines."""
+    blocks: List[ThreadBlock] = []
+    depth = -1
+    lines: List[Line] = []
+    pos = 0
+
+    for line in text.splitlines(keepends=True):
+        prefix = QUOTE_PREFIX.match(line)
+        prefix_len = prefix.end() if prefix else 0
+        line_depth = line.count('>', 0, prefix_len)
+
+        # Each quoted message starts a new block, whatever its depth
+        if lines and (line_depth != depth or ATTRIBUTION.match(line, prefix_len)):
+            blocks.append(ThreadBlock(depth, lines))
+            lines = []
+        depth = line_depth
+        lines.append((pos, pos + prefix_len, pos + len(line)))
+        pos += len(line)
+
+    if lines:
+        blocks.append(ThreadBlock(depth, lines))
+    return blocks
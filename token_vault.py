@@ -0,0 +1,150 @@
+import json
+import os
+import re
+import zlib
+from typing import Dict, Iterable, List, Optional
+from entities import EntityColumns
+from logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Matches mask tokens such as [email]_1a2b3c and [MASKED]_1a2b3c, and
+# the numbered variants given to colliding values, such as [email]_1a2b3c_2
+TOKEN_PATTERN = re.compile(r'(\[\w+\]_[0-9a-f]{6})(_\d+)?')
+
+VAULT_KEY_ENV = "PII_VAULT_KEY"
+
+
+class TokenVault:
+    """Maps mask tokens back to the original values they replaced."""
+
+    def __init__(self, vault_file: Optional[str] = None, key: Optional[bytes] = None):
+        # token -> original value
+        self.originals: Dict[str, str] = {}
+        self.collisions = 0
+        self.dirty = False
+
+        # Persisting is opt-in and always encrypted, since the vault holds raw PII
+        self.vault_file = vault_file
+        self._fernet = None
+        if vault_file:
+            self._fernet = self._load_fernet(key or os.environ.get(VAULT_KEY_ENV, '').encode())
+            self.load()
+
+    @staticmethod
+    def _load_fernet(key: bytes):
+        if not key:
+            raise ValueError(f"A vault key is needed to persist the vault (set {VAULT_KEY_ENV})")
+        from cryptography.fernet import Fernet  # optional: pip install cryptography
+
+        return Fernet(key)
+
+    @staticmethod
+    def generate_key() -> bytes:
+        """Create a new key for encrypted persistence."""
+        from cryptography.fernet import Fernet
+
+        return Fernet.generate_key()
+
+    def assign(self, token: str, value: str) -> str:
+        """Return the token for value, numbering it if another value has it.
+
+        The first value keeps the plain token, so tokens only change for
+        values whose truncated digests collide.
+        """
+        originals = self.originals
+        candidate = token
+        number = 1
+        while True:
+            known = originals.get(candidate)
+            if known is None:
+                originals[candidate] = value
+                self.dirty = True
+                return candidate
+            if known == value:
+                return candidate
+            if number == 1:
+                self.collisions += 1
+                logger.warning(f"Token collision for {token}")
+            number += 1
+            candidate = f"{token}_{number}"
+
+    def add(self, token: str, value: str):
+        """Remember the original value behind a token."""
+        known = self.originals.get(token)
+        if known is None:
+            self.originals[token] = value
+            self.dirty = True
+        elif known != value:
+            # Two values share a truncated digest; keep the first mapping
+            self.collisions += 1
+            logger.warning(f"Token collision for {token}")
+
+    def add_entities(self, entities: EntityColumns, masker) -> int:
+        """Record the tokens for a result's entities; return how many."""
+        count = 0
+        for pii_type, value in entities.pairs():
+            self.add(masker.token_for(pii_type, value), value)
+            count += 1
+        return count
+
+    def get(self, token: str) -> Optional[str]:
+        return self.originals.get(token)
+
+    def unmask(self, masked_text: str) -> str:
+        """Replace every known token in one scan; unknown tokens are left as they are."""
+        originals = self.originals
+
+        def restore(m: re.Match) -> str:
+            token = m.group()
+            if token in originals:
+                return originals[token]
+            # A plain token followed by text that only looks like a number
+            base, suffix = m.groups()
+            if suffix and base in originals:
+                return originals[base] + suffix
+            return token
+
+        return TOKEN_PATTERN.sub(restore, masked_text)
+
+    def unmask_many(self, masked_texts: Iterable[str]) -> List[str]:
+        return [self.unmask(text) for text in masked_texts]
+
+    def __len__(self) -> int:
+        return len(self.originals)
+
+    def __contains__(self, token: str) -> bool:
+        return token in self.originals
+
+    def load(self):
+        """Load and decrypt the vault file."""
+        try:
+            with open(self.vault_file, 'rb') as f:
+                payload = self._fernet.decrypt(f.read())
+            self.originals = json.loads(zlib.decompress(payload))
+            self.dirty = False
+        except FileNotFoundError:
+            self.originals = {}
+        except Exception as e:
+            logger.error(f"Vault load error: {e}")
+            raise
+
+    def save(self):
+        """Compress, encrypt and atomically write the vault if it changed."""
+        if not self.vault_file or not self.dirty:
+            return
+        try:
+            payload = zlib.compress(
+                json.dumps(self.originals, separators=(',', ':')).encode()
+            )
+            tmp_file = f"{self.vault_file}.tmp"
+            fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(self._fernet.encrypt(payload))
+            os.replace(tmp_file, self.vault_file)
+            self.dirty = False
+        except Exception as e:
+            logger.error(f"Vault save error: {e}")
+
+    def close(self):
+        self.save()
@@ -2,8 +2,8 @@ from typing import Optional, Dict, Any
 import os
 import json
 from datetime import datetime
-import hashlib
-from .logger import setup_logger
+from hashing import text_digest
+from logger import setup_logger
 
 logger = setup_logger(__name__)
 
@@ -35,9 +35,9 @@ def save_json(data: Dict, file_path: str) -> bool:
         logger.error(f"JSON save error: {e}")
         return False
 
-def generate_hash(text: str) -> str:
+def generate_hash(text: str, algorithm: str = 'blake2b') -> str:
     """Generate hash for text."""
-    return hashlib.md5(text.encode()).hexdigest()
+    return text_digest(text, algorithm).hex()
 
 def get_timestamp() -> str:
     """Get formatted timestamp."""
@@ -48,8 +48,9 @@ def clean_text(text: str) -> str:
     try:
         # Remove extra whitespace
         text = ' '.join(text.split())
-        # Remove non-printable characters
-        text = ''.join(char for char in text if char.isprintable())
+        # Remove non-printable characters; almost all text has none
+        if not text.isprintable():
+            text = ''.join(filter(str.isprintable, text))
         return text
     except Exception as e:
         logger.error(f"Text cleaning error: {e}")
@@ -1,6 +1,7 @@
 from typing import Dict, Any, Optional, Union
 import re
-from .logger import setup_logger
+from hashing import HASHERS
+from logger import setup_logger
 
 logger = setup_logger(__name__)
 
@@ -8,9 +9,9 @@ logger = setup_logger(__name__)
 class InputValidator:
     """Validates input text and configuration."""
 
-    def __init__(self):
-        self.max_text_length = 10000
-        self.min_text_length = 1
+    def __init__(self, max_text_length: int = 10000, min_text_length: int = 1):
+        self.max_text_length = max_text_length
+        self.min_text_length = min_text_length
 
     def validate_text(self, text: str) -> bool:
         """Validate input text."""
@@ -113,6 +114,38 @@ class ConfigValidator:
                 logger.error("max_size must be integer")
                 return False
 
+            if 'max_bytes' in config and not isinstance(config['max_bytes'], int):
+                logger.error("max_bytes must be integer")
+                return False
+
+            if 'sweep_interval_seconds' in config and not isinstance(
+                    config['sweep_interval_seconds'], (int, float)
+            ):
+                logger.error("sweep_interval_seconds must be a number")
+                return False
+
+            if 'flush_interval_seconds' in config and not isinstance(
+                    config['flush_interval_seconds'], (int, float)
+            ):
+                logger.error("flush_interval_seconds must be a number")
+                return False
+
+            if config.get('policy', 'lru') not in ('lru', 'lfu'):
+                logger.error("policy must be 'lru' or 'lfu'")
+                return False
+
+            algorithm = config.get('hash_algorithm', 'blake2b')
+            if algorithm not in HASHERS:
+                logger.error(f"hash_algorithm must be one of {sorted(HASHERS)}")
+                return False
+
+            # Optional algorithms fail here rather than on every lookup
+            try:
+                HASHERS[algorithm](b'')
+            except ImportError as e:
+                logger.error(f"hash_algorithm '{algorithm}' is not available: {e}")
+                return False
+
             return True
 
         except Exception as e: